@@ -0,0 +1,27 @@
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics
+
+_missing = object()
+
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи чтений для метрик запроса.
+
+    Для бэкендов со своим get_many его тоже нужно переопределить;
+    у LocMemCache и FileBasedCache он сводится к get().
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        metrics.record_cache(*((0, 1) if value is _missing else (1, 0)))
+        return default if value is _missing else value
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    pass
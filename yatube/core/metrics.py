@@ -0,0 +1,180 @@
+"""Метрики запросов: счётчики текущего запроса и гистограммы процесса.
+
+Гистограммы живут в памяти процесса; при нескольких воркерах каждый
+отдаёт свои, и Prometheus собирает их по отдельности.
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Что успел сделать текущий запрос."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def start():
+    _local.current = RequestMetrics()
+    return _local.current
+
+
+def finish():
+    _local.current = None
+
+
+def current():
+    return getattr(_local, 'current', None)
+
+
+def record_query(duration):
+    metrics = current()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.db_time += duration
+
+
+def record_template(duration):
+    metrics = current()
+    if metrics is not None:
+        metrics.template_time += duration
+
+
+def record_cache(hits, misses):
+    metrics = current()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+def _labels(pairs):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series = defaultdict(
+            lambda: [[0] * len(self.buckets), 0, 0.0]
+        )
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series[labels]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            series = sorted(
+                (labels, (list(counts), total, amount))
+                for labels, (counts, total, amount) in self._series.items()
+            )
+        for labels, (counts, total, amount) in series:
+            pairs = list(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket = _labels(pairs + [('le', f'{bound:g}')])
+                lines.append(f'{self.name}_bucket{{{bucket}}} {cumulative}')
+            bucket = _labels(pairs + [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{{{bucket}}} {total}')
+            lines.append(f'{self.name}_sum{{{_labels(pairs)}}} {amount:g}')
+            lines.append(f'{self.name}_count{{{_labels(pairs)}}} {total}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = defaultdict(int)
+
+    def inc(self, amount, *labels):
+        if amount:
+            with self._lock:
+                self._values[labels] += amount
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} counter',
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            pairs = _labels(zip(self.label_names, labels))
+            lines.append(f'{self.name}{{{pairs}}} {value}')
+        return lines
+
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (0, 1, 2, 5, 10, 20, 50, 100)
+
+REQUEST_DURATION = Histogram(
+    'yatube_request_duration_seconds', 'Время обработки запроса.',
+    SECONDS, ['view'],
+)
+DB_DURATION = Histogram(
+    'yatube_db_duration_seconds', 'Время SQL-запросов за запрос.',
+    SECONDS, ['view'],
+)
+DB_QUERIES = Histogram(
+    'yatube_db_queries', 'Число SQL-запросов за запрос.',
+    QUERIES, ['view'],
+)
+TEMPLATE_DURATION = Histogram(
+    'yatube_template_duration_seconds', 'Время отрисовки шаблонов.',
+    SECONDS, ['view'],
+)
+CACHE_REQUESTS = Counter(
+    'yatube_cache_requests_total', 'Обращения к кэшу на чтение.',
+    ['view', 'result'],
+)
+REGISTRY = (
+    REQUEST_DURATION, DB_DURATION, DB_QUERIES, TEMPLATE_DURATION,
+    CACHE_REQUESTS,
+)
+
+
+def observe(view, duration, metrics):
+    REQUEST_DURATION.observe(duration, view)
+    DB_DURATION.observe(metrics.db_time, view)
+    DB_QUERIES.observe(metrics.queries, view)
+    TEMPLATE_DURATION.observe(metrics.template_time, view)
+    CACHE_REQUESTS.inc(metrics.cache_hits, view, 'hit')
+    CACHE_REQUESTS.inc(metrics.cache_misses, view, 'miss')
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
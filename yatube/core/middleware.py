@@ -0,0 +1,249 @@
+import mimetypes
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import compression, metrics, replicas
+from .storage import COMPRESSIBLE_EXTENSIONS
+
+# Имя с хэшем содержимого никогда не меняет содержимое
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Файлы без хэша (например, из шаблонов по прямой ссылке)
+STATIC_CACHE_CONTROL = 'public, max-age=60'
+# Сжатые копии в порядке предпочтения
+PRECOMPRESSED = [('br', '.br'), ('gzip', '.gz')]
+
+
+def _record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(time.perf_counter() - started)
+
+
+def _server_timing(duration, request_metrics):
+    return ', '.join([
+        f'db;dur={request_metrics.db_time * 1000:.1f};'
+        f'desc="{request_metrics.queries} queries"',
+        f'tpl;dur={request_metrics.template_time * 1000:.1f}',
+        f'cache;desc="hit={request_metrics.cache_hits} '
+        f'miss={request_metrics.cache_misses}"',
+        f'total;dur={duration * 1000:.1f}',
+    ])
+
+
+class MetricsMiddleware:
+    """Считает SQL, шаблоны и кэш запроса и пишет их в гистограммы.
+
+    Метки — имя представления из resolver_match. Итог запроса уходит
+    и в заголовок Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_record_query)
+                    )
+                response = self.get_response(request)
+            duration = time.perf_counter() - started
+        finally:
+            metrics.finish()
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        metrics.observe(view, duration, request_metrics)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = _server_timing(
+                duration, request_metrics
+            )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет за основной базой клиента, который только что писал.
+
+    Пока жива кука replicas.PIN_COOKIE, ленты читаются не с реплик,
+    и автор сразу видит свой пост, комментарий или подписку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas.start(pinned=replicas.PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = replicas.finish()
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                replicas.PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+def _accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        try:
+            quality = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            quality = 0.0
+        coding = coding.strip().lower()
+        if coding and quality > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class PrecompressedStaticMiddleware:
+    """Отдаёт собранную collectstatic статику, не доходя до представлений.
+
+    Файлы из манифеста (с хэшем в имени) помечаются immutable и
+    кэшируются клиентом на год. Если клиент принимает br или gzip,
+    отдаётся заранее сжатая копия. Работает только без DEBUG.
+    """
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    @cached_property
+    def hashed_names(self):
+        return set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        prefix = settings.STATIC_URL
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(prefix)
+        ):
+            response = self.serve(request, request.path_info[len(prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except (SuspiciousFileOperation, ValueError):
+            return None
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        compressible = (
+            os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+        )
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime,
+            stat.st_size,
+        ):
+            response = HttpResponseNotModified()
+        else:
+            served, encoding = path, None
+            if compressible:
+                accepted = _accepted_encodings(
+                    request.META.get('HTTP_ACCEPT_ENCODING', '')
+                )
+                for coding, suffix in PRECOMPRESSED:
+                    if coding in accepted and os.path.isfile(path + suffix):
+                        served, encoding = path + suffix, coding
+                        break
+            response = FileResponse(open(served, 'rb'))
+            # Тип — по исходному имени, а не по .gz/.br
+            content_type, _ = mimetypes.guess_type(path)
+            response['Content-Type'] = (
+                content_type or 'application/octet-stream'
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if name in self.hashed_names
+            else STATIC_CACHE_CONTROL
+        )
+        if compressible:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы больше COMPRESSION_MIN_SIZE.
+
+    Кодировка выбирается по Accept-Encoding (br, затем gzip); потоковые
+    ответы сжимаются по частям. Сжатое тело страниц лент, помеченных
+    compression.cache_compressed, тоже берётся из кэша.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.has_header('Content-Encoding')
+            or not compression.compressible(response.get('Content-Type', ''))
+            or 'no-transform' in response.get('Cache-Control', '')
+        ):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        # Ответ зависит от Accept-Encoding, даже если сейчас не сжат.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = _accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        coding = next(
+            (c for c in compression.encodings() if c in accepted), None
+        )
+        if coding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                coding, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            if getattr(response, 'cache_compressed', False):
+                body = compression.compress_cached(coding, response.content)
+            else:
+                body = compression.compress(coding, response.content)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+        etag = response.get('ETag', '')
+        if etag.startswith('"'):
+            # Сжатое тело отличается побайтно: ETag становится слабым.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
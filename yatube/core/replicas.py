@@ -0,0 +1,84 @@
+"""Чтение лент с реплик с закреплением за основной базой после записи.
+
+На реплики уходят только чтения внутри представлений, помеченных
+use_replica. Клиент, который только что что-то записал, ещё
+REPLICA_PIN_SECONDS читает с основной базы: реплика могла не успеть
+получить его изменения.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Кука, по которой клиент закреплён за основной базой
+PIN_COOKIE = 'primary'
+# Сессии и учётные записи всегда читаются с основной базы: сразу после
+# входа или регистрации реплика может их ещё не знать.
+PRIMARY_APPS = {'auth', 'sessions'}
+
+_local = threading.local()
+
+
+def start(pinned):
+    _local.pinned = pinned
+    _local.wrote = False
+
+
+def finish():
+    """Сбрасывает состояние запроса; True, если запрос что-то записал."""
+    wrote = getattr(_local, 'wrote', False)
+    _local.pinned = False
+    _local.wrote = False
+    return wrote
+
+
+@contextmanager
+def replica_reads():
+    previous = getattr(_local, 'replica', False)
+    _local.replica = True
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+def serving():
+    """Читает ли текущий запрос ленты с реплики.
+
+    Такая страница может быть старше поколения лент в кэше: её нельзя
+    ни класть в кэш фрагментов, ни подписывать ETag.
+    """
+    return bool(
+        settings.DATABASE_REPLICAS
+        and getattr(_local, 'replica', False)
+        and not getattr(_local, 'pinned', False)
+    )
+
+
+def use_replica(view):
+    """Разрешает представлению читать с реплик."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Пишет в основную базу, ленты читает со случайной реплики."""
+
+    def db_for_read(self, model, **hints):
+        if serving() and model._meta.app_label not in PRIMARY_APPS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними допустимы.
+        return True
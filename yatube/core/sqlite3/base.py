@@ -0,0 +1,17 @@
+"""Бэкенд SQLite с настройкой соединений для работы под нагрузкой."""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        # Обычный BEGIN берёт блокировку записи только на первой записи.
+        # Если к этому времени пишет другое соединение, SQLite сразу
+        # отвечает «database is locked», не дожидаясь busy_timeout.
+        self.cursor().execute(f'BEGIN {settings.SQLITE_TRANSACTION_MODE}')
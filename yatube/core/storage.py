@@ -0,0 +1,70 @@
+"""Статика для боевого режима: имена с хэшем содержимого и заранее
+сжатые копии рядом с файлами (.gz, и .br, если установлен brotli).
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Картинки и шрифты уже сжаты, их не трогаем
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.map', '.svg', '.txt', '.html', '.json', '.xml', '.ico',
+}
+
+
+def _gzip(content):
+    # mtime=0: одинаковый файл при каждом collectstatic
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def _brotli(content):
+    return brotli.compress(content, quality=11)
+
+
+ENCODERS = [('.gz', _gzip)]
+if brotli is not None:
+    ENCODERS.append(('.br', _brotli))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест хэшированных имён плюс сжатые копии для каждого из них."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            compressed = self.compress(name)
+            if compressed:
+                yield name, ', '.join(compressed), True
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Файла нет в манифесте: ссылка без хэша вместо ошибки 500
+            # на каждой странице, где он упомянут.
+            return name
+
+    def compress(self, name):
+        """Пишет сжатые копии файла; возвращает имена записанных."""
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return []
+        with self.open(name) as source:
+            content = source.read()
+        written = []
+        for suffix, encode in ENCODERS:
+            encoded = encode(content)
+            # Сжатая копия, которая не меньше оригинала, не нужна
+            if len(encoded) >= len(content):
+                continue
+            path = self.path(name + suffix)
+            with open(path, 'wb') as target:
+                target.write(encoded)
+            written.append(name + suffix)
+        return written
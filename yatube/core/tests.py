@@ -0,0 +1,285 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import (Client, RequestFactory, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.models import Post
+
+from . import compression, metrics, replicas
+from .middleware import CompressionMiddleware, _accepted_encodings
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for name in ('db;dur=', 'tpl;dur=', 'cache;desc="hit=', 'total;dur='):
+            self.assertIn(name, timing)
+        self.assertNotIn('db;dur=0.0;desc="0 queries"', timing)
+
+    def test_cache_hits_and_misses_are_counted(self):
+        request_metrics = metrics.start()
+        try:
+            cache.set('key', 'value')
+            cache.get('key')
+            cache.get('missing')
+            cache.get_many(['key', 'other'])
+        finally:
+            metrics.finish()
+        self.assertEqual(request_metrics.cache_hits, 2)
+        self.assertEqual(request_metrics.cache_misses, 2)
+
+    def test_histogram_render(self):
+        histogram = metrics.Histogram(
+            'test_seconds', 'Тест.', (0.1, 1), ['view']
+        )
+        histogram.observe(0.05, 'a"b')
+        histogram.observe(0.5, 'a"b')
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{view="a\\"b",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{view="a\\"b",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{view="a\\"b",le="+Inf"} 2', lines)
+        self.assertIn('test_seconds_count{view="a\\"b"} 2', lines)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', body)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"}', body
+        )
+        self.assertIn('yatube_db_queries_bucket{view="posts:index"', body)
+
+
+class SqliteConnectionTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234,
+                                       'temp_store': 'memory'})
+    def test_pragmas_are_applied_to_new_connections(self):
+        raw = connection.get_new_connection(
+            connection.get_connection_params()
+        )
+        try:
+            self.assertEqual(
+                raw.execute('PRAGMA busy_timeout').fetchone()[0], 1234
+            )
+            self.assertEqual(raw.execute('PRAGMA temp_store').fetchone()[0], 2)
+        finally:
+            raw.close()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaTests(TestCase):
+    # В тестах реплика — отдельная пустая база, в которую ничего не
+    # реплицируется: по содержимому ленты видно, откуда её прочитали.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_feed_is_read_from_replica_until_client_writes(self):
+        Post.objects.create(text='Старый пост', author=self.user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Старый пост')
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'}
+        )
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+        self.assertContains(response, 'Старый пост')
+
+    def test_stale_replica_page_is_not_cached(self):
+        # Реплика ничего не получает, то есть отстаёт навсегда.
+        reader = Client()
+        self.client.post(reverse('posts:post_create'), {'text': 'Свежий пост'})
+        response = reader.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Свежий пост')
+        self.assertFalse(response.has_header('ETag'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+        self.assertTrue(response.has_header('ETag'))
+        # Число постов считается на основной базе, а не на реплике.
+        response = reader.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+    def test_router_sends_only_marked_reads_to_replica(self):
+        router = replicas.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Post))
+        with replicas.replica_reads():
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertIsNone(router.db_for_read(User))
+            replicas.start(pinned=True)
+            try:
+                self.assertIsNone(router.db_for_read(Post))
+            finally:
+                replicas.finish()
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pin_cookie_without_replicas(self):
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Пост'}
+        )
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+
+class PrecompressedStaticTests(TestCase):
+    CSS = b'body { color: red; }\n' * 200
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'app.css'), 'wb') as css:
+            css.write(cls.CSS)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        cls.settings.enable()
+        call_command(
+            'collectstatic', interactive=False, verbosity=0,
+            ignore_patterns=['admin'],
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def hashed_url(self):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        return staticfiles_storage.url('css/app.css')
+
+    def test_hashed_file_is_served_precompressed_and_immutable(self):
+        url = self.hashed_url()
+        self.assertNotEqual(url, '/static/css/app.css')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), self.CSS)
+
+    def test_plain_body_when_encoding_not_accepted(self):
+        response = self.client.get(
+            self.hashed_url(), HTTP_ACCEPT_ENCODING='gzip;q=0, identity'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.CSS)
+
+    def test_unhashed_and_missing_files(self):
+        response = self.client.get('/static/css/app.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.client.get('/static/css/missing.css')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/static/../settings.py')
+        self.assertEqual(response.status_code, 404)
+
+    def test_accept_encoding_parsing(self):
+        self.assertEqual(
+            _accepted_encodings('gzip;q=0.5, br;q=0, Deflate'),
+            {'gzip', 'deflate'},
+        )
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='writer')
+        for i in range(5):
+            Post.objects.create(text=f'Длинный пост {i} ' * 50, author=author)
+        self.url = reverse('posts:index')
+
+    def test_feed_page_is_gzipped(self):
+        plain = self.client.get(self.url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_cached_page_is_not_recompressed(self):
+        self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch.object(
+            compression, 'compress', wraps=compression.compress
+        ) as compress:
+            response = self.client.get(
+                self.url, HTTP_ACCEPT_ENCODING='gzip'
+            )
+        compress.assert_not_called()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_only_feed_pages_are_cached_compressed(self):
+        post = Post.objects.first()
+        with mock.patch.object(
+            compression, 'compress_cached', wraps=compression.compress_cached
+        ) as compress_cached:
+            # У страницы поста CSRF-токен в форме: тело каждый раз новое.
+            response = self.client.get(
+                reverse('posts:post_detail', args=[post.id]),
+                HTTP_ACCEPT_ENCODING='gzip',
+            )
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            compress_cached.assert_not_called()
+            self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            compress_cached.assert_called_once()
+
+    @override_settings(COMPRESSION_MIN_SIZE=10 ** 6)
+    def test_small_responses_are_left_alone(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response(self):
+        chunks = [b'<p>' + b'x' * 100 + b'</p>' for _ in range(10)]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks))
+        )
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), b''.join(chunks))
@@ -0,0 +1,91 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                wait)
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from jobs import queue
+
+
+def _init_worker():
+    django.setup()
+
+
+def _run(job_id):
+    # Каждый поток и процесс держит своё соединение: закрываем его,
+    # чтобы не копить открытые соединения между задачами.
+    try:
+        return queue.run_job(job_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.JOBS_WORKERS,
+            help='Размер пула обработчиков.',
+        )
+        parser.add_argument(
+            '--mode', choices=('thread', 'process'), default='thread',
+            help='Пул потоков или процессов.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.JOBS_BATCH_SIZE,
+            help='Сколько задач забирать из очереди за раз.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if options['mode'] == 'process':
+            # spawn: дочерним процессам не достаются открытые соединения.
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        else:
+            pool = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='jobs'
+            )
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        done = failed = 0
+        with pool:
+            while not self.stopping:
+                ids = queue.dequeue(options['batch_size'])
+                if not ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                futures = [pool.submit(_run, job_id) for job_id in ids]
+                wait(futures)
+                for future in futures:
+                    if future.exception() is None and future.result():
+                        done += 1
+                    else:
+                        failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
+
+    def stop(self, signum, frame):
+        # Дожидаемся текущей пачки и выходим.
+        self.stopping = True
@@ -0,0 +1,125 @@
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def job(name):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def decorator(func):
+        _registry[name] = func
+        func.job_name = name
+        return func
+    return decorator
+
+
+def enqueue(job_name, delay=0, **kwargs):
+    """Ставит задачу в очередь.
+
+    Задача пишется в ту же транзакцию, что и вызвавшие её изменения,
+    поэтому при откате она тоже пропадёт. Аргументы должны
+    сериализоваться в JSON.
+    """
+    if job_name not in _registry:
+        raise KeyError(f'Неизвестная задача: {job_name}')
+    return Job.objects.create(
+        name=job_name,
+        payload=json.dumps(kwargs),
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def requeue_expired():
+    """Возвращает в очередь задачи, захваченные дольше JOBS_LEASE_TIMEOUT.
+
+    Такие задачи остались от воркера, который упал, не успев их
+    выполнить. Возврат считается попыткой: задача, которая каждый раз
+    роняет воркер, в конце концов получает статус FAILED.
+    """
+    expired = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_LEASE_TIMEOUT
+        ),
+    )
+    changes = {
+        'attempts': F('attempts') + 1,
+        'last_error': 'Истёк срок захвата задачи',
+        'locked_by': '',
+        'locked_at': None,
+    }
+    expired.filter(
+        attempts__gte=settings.JOBS_MAX_ATTEMPTS - 1
+    ).update(status=Job.FAILED, **changes)
+    return expired.update(status=Job.QUEUED, **changes)
+
+
+def dequeue(batch_size, token=None):
+    """Забирает пачку готовых задач и помечает их как выполняемые.
+
+    Строки захватываются одним UPDATE с условием на статус, поэтому
+    параллельные воркеры не получат одну и ту же задачу дважды.
+    Перед этим в очередь возвращаются задачи с истёкшим захватом.
+    """
+    token = token or uuid.uuid4().hex
+    requeue_expired()
+    ids = list(
+        Job.objects.filter(
+            status=Job.QUEUED, run_at__lte=timezone.now()
+        ).order_by('run_at', 'id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+        status=Job.RUNNING, locked_by=token, locked_at=timezone.now()
+    )
+    return list(
+        Job.objects.filter(locked_by=token, status=Job.RUNNING).values_list(
+            'id', flat=True
+        )
+    )
+
+
+def _retry_delay(attempts):
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run_job(job_id):
+    """Выполняет задачу; при успехе удаляет её, при ошибке откладывает.
+
+    Возвращает True, если задача выполнена.
+    """
+    item = Job.objects.get(pk=job_id)
+    attempts = item.attempts + 1
+    try:
+        func = _registry[item.name]
+        func(**json.loads(item.payload))
+    except Exception as error:
+        logger.exception('Задача %s завершилась ошибкой', item)
+        changes = {
+            'attempts': attempts,
+            'last_error': repr(error),
+            'locked_by': '',
+            'locked_at': None,
+        }
+        if attempts >= settings.JOBS_MAX_ATTEMPTS:
+            changes['status'] = Job.FAILED
+        else:
+            changes['status'] = Job.QUEUED
+            changes['run_at'] = timezone.now() + timedelta(
+                seconds=_retry_delay(attempts)
+            )
+        Job.objects.filter(pk=job_id).update(**changes)
+        return False
+    Job.objects.filter(pk=job_id).delete()
+    return True
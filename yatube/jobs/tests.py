@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+calls = []
+
+
+@queue.job('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@queue.job('tests.broken')
+def broken():
+    raise RuntimeError('сломалось')
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_DELAY=10)
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_unknown_job_is_rejected(self):
+        with self.assertRaises(KeyError):
+            queue.enqueue('tests.unknown')
+
+    def test_dequeue_claims_ready_jobs_once(self):
+        first = queue.enqueue('tests.record', value=1)
+        second = queue.enqueue('tests.record', value=2)
+        queue.enqueue('tests.record', delay=60, value=3)
+        self.assertEqual(queue.dequeue(1), [first.id])
+        self.assertEqual(queue.dequeue(10), [second.id])
+        self.assertEqual(queue.dequeue(10), [])
+
+    def test_successful_job_is_deleted(self):
+        item = queue.enqueue('tests.record', value='привет')
+        self.assertTrue(queue.run_job(item.id))
+        self.assertEqual(calls, ['привет'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_is_retried_with_backoff(self):
+        item = queue.enqueue('tests.broken')
+        delays = []
+        for attempt in range(1, 3):
+            started = timezone.now()
+            with self.assertLogs('jobs.queue', 'ERROR'):
+                self.assertFalse(queue.run_job(item.id))
+            item.refresh_from_db()
+            self.assertEqual(item.status, Job.QUEUED)
+            self.assertEqual(item.attempts, attempt)
+            self.assertIn('сломалось', item.last_error)
+            delays.append(item.run_at - started)
+        self.assertGreaterEqual(delays[0], timedelta(seconds=10))
+        self.assertGreaterEqual(delays[1], timedelta(seconds=20))
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertFalse(queue.run_job(item.id))
+        item.refresh_from_db()
+        self.assertEqual(item.status, Job.FAILED)
+        self.assertEqual(queue.dequeue(10), [])
+
+    @override_settings(JOBS_LEASE_TIMEOUT=60)
+    def test_expired_lease_is_requeued(self):
+        stale = queue.enqueue('tests.record', value=1)
+        fresh = queue.enqueue('tests.record', value=2)
+        self.assertEqual(queue.dequeue(10), [stale.id, fresh.id])
+        Job.objects.filter(pk=stale.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=61)
+        )
+        self.assertEqual(queue.dequeue(10), [stale.id])
+        stale.refresh_from_db()
+        self.assertEqual(stale.attempts, 1)
+
+    @override_settings(JOBS_LEASE_TIMEOUT=60)
+    def test_job_that_keeps_expiring_fails(self):
+        item = queue.enqueue('tests.record', value=1)
+        for attempt in range(3):
+            self.assertEqual(queue.dequeue(10), [item.id])
+            Job.objects.filter(pk=item.pk).update(
+                locked_at=timezone.now() - timedelta(seconds=61)
+            )
+        self.assertEqual(queue.dequeue(10), [])
+        item.refresh_from_db()
+        self.assertEqual(item.status, Job.FAILED)
+        self.assertEqual(item.attempts, 3)
+
+
+class RunWorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runworker_drains_queue(self):
+        for value in range(5):
+            queue.enqueue('tests.record', value=value)
+        queue.enqueue('tests.broken')
+        out = StringIO()
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            # Один обработчик: общая SQLite в памяти не пускает два
+            # потока к таблице одновременно.
+            call_command('runworker', once=True, workers=1, batch_size=2,
+                         stdout=out)
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertEqual(
+            list(Job.objects.values_list('name', flat=True)),
+            ['tests.broken'],
+        )
+        self.assertIn('Выполнено задач: 5, с ошибкой: 1', out.getvalue())
@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.db import connection
 
+from .forms import PostAdminForm
 from .models import Group, Post
+from .paginators import EstimatedCountPaginator
+from .search import MatchingPostIds, match_expression
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -9,17 +13,38 @@ class GroupAdmin(admin.ModelAdmin):
         "title",
         "description",
     )
-    list_filter = ("slug",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
 
 class PostAdmin(admin.ModelAdmin):
+    # CappedUploadHandler обрезает большие загрузки и в админке: без
+    # проверки формы обрезок сохранился бы молча и без пересжатия.
+    form = PostAdminForm
     list_display = ("pk", "text", "pub_date", "author", "group")
     list_editable = ("group",)
+    list_select_related = ("author", "group")
+    autocomplete_fields = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
+    date_hierarchy = "pub_date"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        # В SQLite ищем по полнотекстовому индексу, а не LIKE по таблице.
+        # Только по тексту поста, как search_fields: колонки группы в
+        # индексе нужны поиску на сайте.
+        expression = match_expression(search_term, column="text")
+        if connection.vendor != "sqlite" or not expression:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        queryset = queryset.filter(pk__in=MatchingPostIds(expression))
+        return queryset, False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
@@ -0,0 +1,220 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from core import replicas
+
+from .models import Follow, Post
+
+INDEX_FEED = "index"
+# Общее поколение всех лент: сдвигается, когда меняется то, что видно
+# на карточках многих постов сразу (slug группы, имя автора).
+CARDS_FEED = "cards"
+
+
+def group_feed(group_id):
+    return f"group:{group_id}"
+
+
+def author_feed(author_id):
+    return f"author:{author_id}"
+
+
+def follow_feed(user_id):
+    return f"follow:{user_id}"
+
+
+def post_feed(post_id):
+    """Страница отдельного поста с комментариями."""
+    return f"post:{post_id}"
+
+
+def _generation_key(feed):
+    return f"feed-generation:{feed}"
+
+
+def _count_key(feed):
+    return f"feed-count:{feed}"
+
+
+def _initial_generation():
+    # Стартуем с отметки времени, чтобы после вытеснения ключа из кэша
+    # поколение не совпало с уже выданным раньше.
+    return time.time_ns() // 1000
+
+
+def generation(feed):
+    """Текущее поколение ленты; меняется при каждой записи в неё."""
+    key = _generation_key(feed)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _initial_generation(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump(*feeds):
+    """Инвалидирует ленты, сдвигая их поколения."""
+    for feed in feeds:
+        key = _generation_key(feed)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_generation(), None)
+
+
+def post_feeds(post, group_ids=(), follower_ids=()):
+    """Ленты, в которых показывается пост."""
+    feeds = {INDEX_FEED, author_feed(post.author_id)}
+    feeds.update(
+        group_feed(group_id)
+        for group_id in {post.group_id, *group_ids}
+        if group_id is not None
+    )
+    feeds.update(follow_feed(user_id) for user_id in follower_ids)
+    return feeds
+
+
+def feed_count(feed, queryset):
+    """Число постов в ленте; COUNT(*) выполняется только при промахе.
+
+    Считаем на основной базе: отставшая реплика дала бы старое число,
+    а оно живёт в кэше до следующей записи в ленту.
+    """
+    key = _count_key(feed)
+    value = cache.get(key)
+    if value is None:
+        value = queryset.using(DEFAULT_DB_ALIAS).count()
+        cache.add(key, value, None)
+    return value
+
+
+def _adjust_counts(feeds, delta):
+    for feed in feeds:
+        try:
+            if delta > 0:
+                cache.incr(_count_key(feed), delta)
+            else:
+                cache.decr(_count_key(feed), -delta)
+        except ValueError:
+            # Счётчика нет в кэше — посчитается при следующем чтении.
+            pass
+
+
+def post_created(post, follower_ids):
+    feeds = post_feeds(post, follower_ids=follower_ids)
+    _adjust_counts(feeds, 1)
+    bump(post_feed(post.id), *feeds)
+
+
+def timelines_changed(user_ids):
+    """Ленты подписок изменились в фоновой задаче: пост разложен по ним,
+    исправлен или удалён."""
+    feeds = [follow_feed(user_id) for user_id in user_ids]
+    # Задача может выполниться повторно: счётчики пересчитаем.
+    cache.delete_many([_count_key(feed) for feed in feeds])
+    bump(*feeds)
+
+
+def cards_changed():
+    """Карточки постов устарели сразу во многих лентах."""
+    bump(CARDS_FEED)
+
+
+def post_changed(post, old_group_id, follower_ids):
+    if old_group_id != post.group_id:
+        if old_group_id is not None:
+            _adjust_counts([group_feed(old_group_id)], -1)
+        if post.group_id is not None:
+            _adjust_counts([group_feed(post.group_id)], 1)
+    bump(post_feed(post.id), *post_feeds(post, [old_group_id], follower_ids))
+
+
+def post_deleted(post, follower_ids):
+    _adjust_counts(post_feeds(post), -1)
+    # Ленты подписок могут и не содержать старый пост: пересчитаем их.
+    cache.delete_many(
+        [_count_key(follow_feed(user_id)) for user_id in follower_ids]
+    )
+    bump(post_feed(post.id), *post_feeds(post, follower_ids=follower_ids))
+
+
+def _following_key(user_id):
+    return f"following:{user_id}"
+
+
+def following_ids(user_id):
+    """Множество id авторов, на которых подписан пользователь.
+
+    Держится в кэше; при промахе загружается одним запросом.
+    """
+    if user_id is None:
+        return frozenset()
+    key = _following_key(user_id)
+    value = cache.get(key)
+    if value is None:
+        # Читаем с основной базы: реплика могла отстать, а множество
+        # живёт в кэше до следующей подписки или отписки.
+        value = frozenset(
+            Follow.objects.using("default")
+            .filter(user_id=user_id)
+            .values_list("author_id", flat=True)
+        )
+        cache.add(key, value, None)
+    return value
+
+
+def follow_changed(user_id, author_ids):
+    feed = follow_feed(user_id)
+    cache.delete_many([_count_key(feed), _following_key(user_id)])
+    # Профили авторов показывают число подписчиков.
+    bump(feed, *(author_feed(author_id) for author_id in author_ids))
+
+
+def fragment_timeout():
+    """Время жизни фрагмента ленты; 0 — не кэшировать.
+
+    Страница с реплики может не содержать записей, по которым уже сдвинуто
+    поколение, и под его ключом подменила бы свежую страницу автору.
+    """
+    if replicas.serving():
+        return 0
+    return settings.FEED_CACHE_TIMEOUT
+
+
+def page_cache_key(feed, position):
+    """Ключ фрагмента страницы ленты: поколение плюс позиция страницы
+    (CursorPaginator.cache_position)."""
+    return (
+        f"{feed}:{generation(feed)}:{generation(CARDS_FEED)}:{position}"
+    )
+
+
+def feed_etag(request, *feeds):
+    """ETag страницы: поколения её лент, адрес и пользователь.
+
+    Считается только по кэшу, без запросов к таблицам постов. Страницам
+    с реплики ETag не даём: они могут быть старше поколения.
+    """
+    if replicas.serving():
+        return None
+    parts = [str(generation(feed)) for feed in (*feeds, CARDS_FEED)]
+    parts += [request.get_full_path(), str(request.user.pk)]
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def post_author_id(post_id):
+    """Автор поста; в базу идём только при промахе кэша."""
+    key = f"post-author:{post_id}"
+    author_id = cache.get(key)
+    if author_id is None:
+        # Основная база: с реплики новый пост мог бы ещё не прочитаться.
+        author_id = Post.objects.using(DEFAULT_DB_ALIAS).filter(
+            pk=post_id
+        ).values_list("author_id", flat=True).first()
+        if author_id is not None:
+            cache.set(key, author_id, None)
+    return author_id
@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Comment, Follow, Post, User, UserStats
+
+USER_COUNTERS = {
+    "posts_count": (Post, "author_id"),
+    "followers_count": (Follow, "author_id"),
+    "following_count": (Follow, "user_id"),
+}
+
+
+def _bump(queryset, field, delta):
+    if delta < 0:
+        # Не уходим ниже нуля, если счётчик уже разошёлся с данными.
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_user(user_id, field, delta):
+    """Атомарно меняет счётчик пользователя на delta."""
+    stats = UserStats.objects.filter(pk=user_id)
+    if not _bump(stats, field, delta) and delta > 0:
+        UserStats.objects.get_or_create(user_id=user_id)
+        _bump(stats, field, delta)
+
+
+def change_comments(post_id, delta):
+    _bump(Post.objects.filter(pk=post_id), "comments_count", delta)
+
+
+def _batches(queryset, batch_size):
+    ids = queryset.order_by("pk").values_list("pk", flat=True)
+    last = 0
+    while True:
+        batch = list(ids.filter(pk__gt=last)[:batch_size])
+        if not batch:
+            return
+        last = batch[-1]
+        yield batch
+
+
+def _counts(model, key, ids):
+    return dict(
+        model.objects.filter(**{f"{key}__in": ids}).order_by()
+        .values(key).annotate(total=Count("pk"))
+        .values_list(key, "total")
+    )
+
+
+def repair_users(batch_size):
+    """Пересчитывает счётчики пользователей, возвращает число исправлений."""
+    fixed = 0
+    for ids in _batches(User.objects.all(), batch_size):
+        with transaction.atomic():
+            actual = {
+                field: _counts(model, key, ids)
+                for field, (model, key) in USER_COUNTERS.items()
+            }
+            stored = UserStats.objects.in_bulk(ids)
+            missing, drifted = [], []
+            for user_id in ids:
+                values = {
+                    field: counts.get(user_id, 0)
+                    for field, counts in actual.items()
+                }
+                stats = stored.get(user_id)
+                if stats is None:
+                    missing.append(UserStats(user_id=user_id, **values))
+                    continue
+                if any(getattr(stats, f) != v for f, v in values.items()):
+                    for field, value in values.items():
+                        setattr(stats, field, value)
+                    drifted.append(stats)
+            UserStats.objects.bulk_create(missing, ignore_conflicts=True)
+            UserStats.objects.bulk_update(drifted, list(USER_COUNTERS))
+        fixed += len(missing) + len(drifted)
+    return fixed
+
+
+def repair_posts(batch_size):
+    """Пересчитывает число комментариев у постов."""
+    fixed = 0
+    for ids in _batches(Post.objects.all(), batch_size):
+        with transaction.atomic():
+            actual = _counts(Comment, "post_id", ids)
+            drifted = [
+                Post(pk=pk, comments_count=actual.get(pk, 0))
+                for pk, stored in Post.objects.filter(pk__in=ids)
+                .values_list("pk", "comments_count")
+                if stored != actual.get(pk, 0)
+            ]
+            Post.objects.bulk_update(drifted, ["comments_count"])
+        fixed += len(drifted)
+    return fixed
@@ -0,0 +1,115 @@
+"""Подписки без гонок: каждая запись — один INSERT или DELETE.
+
+get_or_create делает SELECT и INSERT отдельно, и два параллельных
+запроса вставляли дубликаты. Теперь дубликаты запрещены ограничением
+уникальности, а вставка пропускает уже существующую пару.
+
+Побочные эффекты (счётчики, ленты, кэш) вешаются на сигналы followed и
+unfollowed; их же посылают post_save и post_delete модели Follow.
+"""
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.dispatch import Signal
+
+from .models import Follow, User
+
+followed = Signal(providing_args=["user_id", "author_ids"])
+unfollowed = Signal(providing_args=["user_id", "author_ids"])
+
+# SQLite ограничивает число параметров запроса
+DELETE_BATCH_SIZE = 500
+
+
+def _columns():
+    meta = Follow._meta
+    return (
+        meta.db_table,
+        meta.get_field("user").column,
+        meta.get_field("author").column,
+    )
+
+
+def _delete(connection, user_id, author_ids):
+    table, user_column, author_column = map(
+        connection.ops.quote_name, _columns()
+    )
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(author_ids), DELETE_BATCH_SIZE):
+            batch = author_ids[start:start + DELETE_BATCH_SIZE]
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {user_column} = %s "
+                f"AND {author_column} IN ({', '.join(['%s'] * len(batch))})",
+                [user_id, *batch],
+            )
+            deleted += cursor.rowcount
+    return deleted
+
+
+def follow(user_id, author_id):
+    """Подписывает; True, если подписки ещё не было."""
+    alias = router.db_for_write(Follow)
+    connection = connections[alias]
+    ops = connection.ops
+    table, user_column, author_column = map(ops.quote_name, _columns())
+    sql = " ".join(filter(None, [
+        ops.insert_statement(ignore_conflicts=True),
+        f"{table} ({user_column}, {author_column}) VALUES (%s, %s)",
+        ops.ignore_conflicts_suffix_sql(ignore_conflicts=True),
+    ]))
+    with transaction.atomic(using=alias):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, author_id])
+            created = cursor.rowcount == 1
+        if created:
+            followed.send(Follow, user_id=user_id, author_ids=[author_id])
+    return created
+
+
+def unfollow(user_id, author_id):
+    """Отписывает; True, если подписка была."""
+    alias = router.db_for_write(Follow)
+    with transaction.atomic(using=alias):
+        deleted = _delete(connections[alias], user_id, [author_id])
+        if deleted:
+            unfollowed.send(Follow, user_id=user_id, author_ids=[author_id])
+    return bool(deleted)
+
+
+def follow_many(user_id, author_ids):
+    """Подписывает сразу на многих авторов; возвращает число новых.
+
+    Несуществующие авторы и сам пользователь пропускаются.
+    """
+    alias = router.db_for_write(Follow)
+    with transaction.atomic(using=alias):
+        new_ids = sorted(
+            User.objects.using(alias)
+            .filter(pk__in=set(author_ids))
+            .exclude(pk=user_id)
+            .exclude(following__user_id=user_id)
+            .values_list("pk", flat=True)
+        )
+        Follow.objects.using(alias).bulk_create(
+            (Follow(user_id=user_id, author_id=pk) for pk in new_ids),
+            batch_size=settings.TIMELINE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        if new_ids:
+            followed.send(Follow, user_id=user_id, author_ids=new_ids)
+    return len(new_ids)
+
+
+def unfollow_many(user_id, author_ids):
+    """Отписывает сразу от многих авторов; возвращает число удалённых."""
+    alias = router.db_for_write(Follow)
+    with transaction.atomic(using=alias):
+        removed_ids = sorted(
+            Follow.objects.using(alias)
+            .filter(user_id=user_id, author_id__in=set(author_ids))
+            .values_list("author_id", flat=True)
+        )
+        _delete(connections[alias], user_id, removed_ids)
+        if removed_ids:
+            unfollowed.send(Follow, user_id=user_id, author_ids=removed_ids)
+    return len(removed_ids)
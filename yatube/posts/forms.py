@@ -1,5 +1,10 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
 
+from . import images
 from .models import Comment, Post
 
 
@@ -8,6 +13,44 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ("text", "group", "image")
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        upload = self.files.get("image")
+        self.image_oversized = getattr(upload, "oversized", False)
+        if self.image_oversized:
+            # Обрезанный файл не даём разбирать как картинку.
+            self.files = self.files.copy()
+            del self.files["image"]
+
+    def clean_image(self):
+        image = self.cleaned_data["image"]
+        if isinstance(image, UploadedFile):
+            try:
+                return images.ingest(image)
+            except (OSError, Image.DecompressionBombError):
+                # verify() пропускает, например, обрезанный JPEG: он
+                # ломается только при разборе пикселей.
+                raise forms.ValidationError(
+                    "Не удалось прочитать картинку: файл повреждён "
+                    "или слишком велик."
+                )
+        return image
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.image_oversized:
+            limit = filesizeformat(settings.POST_IMAGE_MAX_UPLOAD_SIZE)
+            self.add_error("image", f"Картинка больше {limit}.")
+        return cleaned_data
+
+
+class PostAdminForm(PostForm):
+    """Форма админки: все поля поста, но та же проверка и пересжатие
+    картинки, что и на сайте."""
+
+    class Meta(PostForm.Meta):
+        fields = "__all__"
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
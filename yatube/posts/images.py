@@ -0,0 +1,75 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POST_IMAGE_WORKERS,
+            thread_name_prefix="image-ingest",
+        )
+    return _executor
+
+
+def _flatten(image):
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def reencode(upload):
+    """Поворачивает по EXIF, уменьшает и пересжимает картинку без
+    метаданных. Возвращает новый файл."""
+    image_format = settings.POST_IMAGE_FORMAT
+    upload.seek(0)
+    with Image.open(upload) as source:
+        image = ImageOps.exif_transpose(source)
+        max_size = settings.POST_IMAGE_MAX_DIMENSION
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        if image_format == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            image = _flatten(image)
+        output = BytesIO()
+        # EXIF и прочие метаданные не передаём — они не попадут в файл.
+        image.save(
+            output,
+            image_format,
+            quality=settings.POST_IMAGE_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return SimpleUploadedFile(
+        f"{name}.{EXTENSIONS[image_format]}",
+        output.getvalue(),
+        content_type=Image.MIME[image_format],
+    )
+
+
+def ingest(upload):
+    """Пересжимает загрузку в пуле потоков и пишет в лог экономию."""
+    started = time.monotonic()
+    result = _get_executor().submit(reencode, upload).result()
+    elapsed = (time.monotonic() - started) * 1000
+    logger.info(
+        "Картинка %s: %d -> %d байт (сэкономлено %d) за %.1f мс",
+        upload.name, upload.size, result.size,
+        upload.size - result.size, elapsed,
+    )
+    return result
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core import compression
+from posts.models import User
+
+from .benchmark_urls import Command as UrlBenchmark
+
+FEED_PAGES = (
+    ("posts:index", ()),
+    ("posts:group_posts", ("slug",)),
+    ("posts:profile", ("username",)),
+    ("posts:post_detail", ("post_id",)),
+    ("posts:follow_index", ()),
+)
+
+
+def cpu_ms(function, repeat):
+    """Процессорное время одного вызова, в миллисекундах."""
+    started = time.process_time()
+    for _ in range(repeat):
+        function()
+    return (time.process_time() - started) * 1000 / repeat
+
+
+class Command(BaseCommand):
+    help = ("Сколько байт экономит сжатие страниц лент и сколько "
+            "процессорного времени оно стоит, со сжатым телом в кэше и без.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=50,
+            help="Сколько раз сжимать каждую страницу.",
+        )
+
+    def handle(self, *args, **options):
+        reader = User.objects.annotate(
+            following_total=Count("follower")
+        ).order_by("-following_total").first()
+        if reader is None:
+            raise CommandError("В базе нет пользователей: запустите seed.")
+        client = Client()
+        client.force_login(reader)
+        kwargs = UrlBenchmark().sample_kwargs(reader)
+        repeat = options["repeat"]
+        for name, url_kwargs in FEED_PAGES:
+            try:
+                url = reverse(
+                    name, kwargs={key: kwargs[key] for key in url_kwargs}
+                )
+            except KeyError:
+                continue
+            # Без Accept-Encoding middleware отдаёт исходное тело.
+            body = client.get(url).content
+            for coding in compression.encodings():
+                compressed = compression.compress(coding, body)
+                fresh = cpu_ms(
+                    lambda: compression.compress(coding, body), repeat
+                )
+                # Первый вызов кладёт сжатое тело в кэш.
+                compression.compress_cached(coding, body)
+                cached = cpu_ms(
+                    lambda: compression.compress_cached(coding, body), repeat
+                )
+                saved = len(body) - len(compressed)
+                self.stdout.write(
+                    f"{name:20} {coding:5} {len(body):8} -> "
+                    f"{len(compressed):7} байт (экономия {saved} байт, "
+                    f"{saved * 100 / max(len(body), 1):.0f}%), CPU "
+                    f"{fresh:.3f} мс, из кэша {cached:.3f} мс"
+                )
@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from posts.search import search_posts
+
+User = get_user_model()
+
+SYLLABLES = (
+    "ка ро ми на ле то ва су ди ре по ша зо лу ны те бо ги жа фе"
+).split()
+# Словарь из 8000 «слов»; частоты по закону Ципфа, как в живом тексте.
+WORDS = [
+    a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES
+][:8000]
+WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+# Частое слово, редкое слово, пара слов и префикс.
+DEFAULT_QUERIES = [WORDS[3], WORDS[2000], f"{WORDS[10]} {WORDS[50]}",
+                   WORDS[400][:4]]
+
+
+class Command(BaseCommand):
+    help = "Сравнивает полнотекстовый поиск с поиском через icontains."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Сколько случайных постов добавить перед замером.",
+        )
+        parser.add_argument(
+            "--query", action="append", dest="queries",
+            help="Поисковый запрос; можно указать несколько раз.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Сколько раз выполнять каждый запрос.",
+        )
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.seed(options["seed"])
+        queries = options["queries"] or DEFAULT_QUERIES
+        limit = settings.PAGE_COUNT
+        self.stdout.write(f"Постов в базе: {Post.objects.count()}")
+        for query in queries:
+            fts = self.measure(
+                options["repeat"], lambda: search_posts(query, limit)
+            )
+            # Без ранжирования показываем свежие совпадения, как в лентах.
+            like = self.measure(
+                options["repeat"],
+                lambda: list(
+                    Post.objects.select_related("author", "group").filter(
+                        text__icontains=query
+                    ).order_by("-pub_date", "-id")[:limit]
+                ),
+            )
+            self.stdout.write(
+                f"{query!r}: fts5 {fts:.2f} мс, icontains {like:.2f} мс"
+            )
+
+    def measure(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def seed(self, count):
+        author, _ = User.objects.get_or_create(username="search-benchmark")
+        rng = random.Random(count)
+        batch_size = 1000
+        with transaction.atomic():
+            for start in range(0, count, batch_size):
+                Post.objects.bulk_create(
+                    Post(
+                        author=author,
+                        text=" ".join(rng.choices(
+                            WORDS, WEIGHTS, k=rng.randint(5, 60)
+                        )),
+                    )
+                    for _ in range(min(batch_size, count - start))
+                )
+        self.stdout.write(
+            f"Добавлено постов: {count}. Счётчики и ленты не обновлялись: "
+            f"запустите repair_counters и rebuild_timelines."
+        )
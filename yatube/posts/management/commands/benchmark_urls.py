@@ -0,0 +1,164 @@
+import json
+import subprocess
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+
+from posts.models import Group, Post, User
+
+NAMESPACES = ("posts", "users", "about")
+# Эти адреса меняют данные или сессию даже на GET.
+SKIPPED = {
+    "posts:api_follow_bulk",
+    "posts:profile_follow",
+    "posts:profile_unfollow",
+    "users:logout",
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(0, round(fraction * len(ordered) + 0.5) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Замеряет все именованные адреса posts, users и about: "
+            "задержку p50/p95, число SQL-запросов и размер ответа.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Сколько раз запрашивать каждый адрес.",
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=2,
+            help="Сколько запросов сделать до замера.",
+        )
+        parser.add_argument(
+            "--anonymous", action="store_true",
+            help="Ходить без авторизации.",
+        )
+        parser.add_argument(
+            "--output", default="-",
+            help="Файл JSON-отчёта; по умолчанию стандартный вывод.",
+        )
+        parser.add_argument(
+            "--compare",
+            help="Прошлый отчёт: вывести изменение p50 по каждому адресу.",
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        reader = None
+        if not options["anonymous"]:
+            reader = User.objects.annotate(
+                following_total=Count("follower")
+            ).order_by("-following_total").first()
+            if reader is None:
+                raise CommandError("В базе нет пользователей: запустите seed.")
+            client.force_login(reader)
+        kwargs = self.sample_kwargs(reader)
+        results = {}
+        for name, url_kwargs in self.url_names():
+            if name in SKIPPED:
+                continue
+            try:
+                url = reverse(
+                    name, kwargs={key: kwargs[key] for key in url_kwargs}
+                )
+            except KeyError:
+                continue
+            results[name] = self.measure(client, url, options)
+        report = {
+            "revision": _git_revision(),
+            "user": reader.username if reader else None,
+            "repeat": options["repeat"],
+            "urls": results,
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"] == "-":
+            self.stdout.write(text)
+        else:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.write(text + "\n")
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def url_names(self):
+        resolver = get_resolver()
+        for namespace in NAMESPACES:
+            _, namespace_resolver = resolver.namespace_dict[namespace]
+            for pattern in namespace_resolver.url_patterns:
+                if pattern.name:
+                    yield (
+                        f"{namespace}:{pattern.name}",
+                        list(pattern.pattern.converters),
+                    )
+
+    def sample_kwargs(self, reader):
+        post = Post.objects.order_by("-comments_count", "-id").first()
+        group = Group.objects.annotate(total=Count("posts")).order_by(
+            "-total").first()
+        author = post.author if post else reader
+        kwargs = {}
+        if author:
+            kwargs["username"] = author.username
+        if post:
+            kwargs["post_id"] = post.id
+        if group:
+            kwargs["slug"] = group.slug
+        return kwargs
+
+    def measure(self, client, url, options):
+        timings = []
+        queries = []
+        try:
+            for _ in range(options["warmup"]):
+                client.get(url)
+            for _ in range(options["repeat"]):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+        except Exception as error:
+            # Адрес падает без обязательных параметров: отмечаем в отчёте.
+            return {"url": url, "error": repr(error)}
+        return {
+            "url": url,
+            "status": response.status_code,
+            "p50_ms": round(percentile(timings, 0.5), 2),
+            "p95_ms": round(percentile(timings, 0.95), 2),
+            "queries": max(queries),
+            "bytes": len(response.content),
+        }
+
+    def compare(self, path, results):
+        with open(path, encoding="utf-8") as previous:
+            before = json.load(previous)["urls"]
+        for name, current in results.items():
+            old = before.get(name, {})
+            if "p50_ms" not in current or "p50_ms" not in old:
+                continue
+            change = current["p50_ms"] - old["p50_ms"]
+            self.stderr.write(
+                f"{name:35} p50 {old['p50_ms']:8.2f} -> "
+                f"{current['p50_ms']:8.2f} мс ({change:+.2f}), запросов "
+                f"{old['queries']} -> {current['queries']}"
+            )
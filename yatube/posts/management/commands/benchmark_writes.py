@@ -0,0 +1,108 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.test.utils import override_settings
+
+from posts import follows
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+# Настройки SQLite по умолчанию: журнал отката, полная синхронизация
+# и отложенный BEGIN.
+DEFAULTS = {
+    "SQLITE_PRAGMAS": {"journal_mode": "delete", "synchronous": "full"},
+    "SQLITE_TRANSACTION_MODE": "DEFERRED",
+}
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает пропускную способность параллельной записи "
+            "с настройками SQLite по умолчанию и с настроенными.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--writes", type=int, default=200,
+            help="Сколько записей делает каждый поток.",
+        )
+
+    def handle(self, *args, **options):
+        self.author = User.objects.create_user(username="write-benchmark")
+        self.readers = [
+            User.objects.create_user(username=f"write-benchmark-{number}")
+            for number in range(options["threads"])
+        ]
+        self.post = Post.objects.create(text="Бенчмарк", author=self.author)
+        try:
+            variants = (
+                ("по умолчанию", DEFAULTS),
+                ("настроенный", {
+                    "SQLITE_PRAGMAS": settings.SQLITE_PRAGMAS,
+                    "SQLITE_TRANSACTION_MODE":
+                        settings.SQLITE_TRANSACTION_MODE,
+                }),
+            )
+            for label, overrides in variants:
+                with override_settings(**overrides):
+                    # Журнал переключаем одним соединением до старта
+                    # потоков: смена режима требует монопольного доступа.
+                    connection.close()
+                    connection.ensure_connection()
+                    self.run(label, options["threads"], options["writes"])
+        finally:
+            connection.close()
+            Post.objects.filter(pk=self.post.pk).delete()
+            User.objects.filter(
+                username__startswith="write-benchmark"
+            ).delete()
+
+    def write(self, reader, step):
+        if step == 0:
+            follows.follow(reader.id, self.author.id)
+        elif step == 1:
+            Comment.objects.create(post=self.post, author=reader, text="Тест")
+        else:
+            follows.unfollow(reader.id, self.author.id)
+
+    def run(self, label, threads, writes):
+        errors = []
+        done = []
+
+        def work(reader):
+            count = 0
+            try:
+                for number in range(writes):
+                    try:
+                        # Как add_comment и profile_follow: запись плюс
+                        # обновление счётчиков в сигналах.
+                        with transaction.atomic():
+                            self.write(reader, number % 3)
+                        count += 1
+                    except OperationalError as error:
+                        errors.append(str(error))
+            finally:
+                done.append(count)
+                connection.close()
+
+        workers = [
+            threading.Thread(target=work, args=(reader,))
+            for reader in self.readers
+        ]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - started
+        total = sum(done)
+        self.stdout.write(
+            f"{label}: {total} записей за {elapsed:.2f} с "
+            f"({total / max(elapsed, 1e-6):.0f} в секунду), "
+            f"ошибок «database is locked»: "
+            f"{sum('locked' in error for error in errors)}"
+        )
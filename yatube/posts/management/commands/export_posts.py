@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ("Выгружает пользователей, группы, посты, комментарии и подписки "
+            "в формате JSON Lines.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default="-",
+            help="Файл выгрузки; по умолчанию стандартный вывод.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="Сколько строк читать из базы за раз.",
+        )
+
+    def handle(self, *args, **options):
+        if options["output"] == "-":
+            output = self.stdout
+        else:
+            output = open(options["output"], "w", encoding="utf-8")
+        started = time.monotonic()
+        rows = 0
+        try:
+            for line in transfer.export_lines(options["chunk_size"]):
+                output.write(line + "\n")
+                rows += 1
+        finally:
+            if output is not self.stdout:
+                output.close()
+        elapsed = time.monotonic() - started
+        # Отчёт пишем в stderr: stdout может быть самой выгрузкой.
+        self.stderr.write(self.style.SUCCESS(
+            f"Выгружено строк: {rows} за {elapsed:.1f} с "
+            f"({rows / max(elapsed, 1e-6):.0f} строк/с)"
+        ))
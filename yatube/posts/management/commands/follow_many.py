@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import follows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Подписывает пользователя сразу на многих авторов или отписывает."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Кого подписываем.")
+        parser.add_argument(
+            "authors", nargs="*", help="Имена авторов.",
+        )
+        parser.add_argument(
+            "--file",
+            help="Файл с именами авторов, по одному в строке.",
+        )
+        parser.add_argument(
+            "--unfollow", action="store_true",
+            help="Отписать вместо подписки.",
+        )
+
+    def handle(self, *args, **options):
+        user_id = User.objects.filter(
+            username=options["username"]
+        ).values_list("id", flat=True).first()
+        if user_id is None:
+            raise CommandError(
+                f"Пользователь {options['username']} не найден."
+            )
+        usernames = set(options["authors"])
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as lines:
+                usernames.update(line.strip() for line in lines)
+        usernames.discard("")
+        author_ids = dict(
+            User.objects.filter(username__in=usernames)
+            .values_list("username", "id")
+        )
+        missing = usernames - set(author_ids)
+        if missing:
+            self.stderr.write(
+                "Не найдены: " + ", ".join(sorted(missing))
+            )
+        if options["unfollow"]:
+            changed = follows.unfollow_many(user_id, author_ids.values())
+            message = f"Удалено подписок: {changed}"
+        else:
+            changed = follows.follow_many(user_id, author_ids.values())
+            message = f"Добавлено подписок: {changed}"
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,66 @@
+import sys
+import time
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = "Загружает выгрузку export_posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input", nargs="?", default="-",
+            help="Файл выгрузки; по умолчанию стандартный ввод.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Сколько строк вставлять за одну транзакцию.",
+        )
+        parser.add_argument(
+            "--media-from",
+            help="MEDIA_ROOT исходного окружения, откуда копировать "
+                 "картинки постов.",
+        )
+        parser.add_argument(
+            "--skip-rebuild", action="store_true",
+            help="Не пересчитывать счётчики и ленты после загрузки.",
+        )
+
+    def handle(self, *args, **options):
+        if options["input"] == "-":
+            lines = sys.stdin
+        else:
+            lines = open(options["input"], encoding="utf-8")
+        importer = transfer.Importer(
+            options["batch_size"], options["media_from"]
+        )
+        started = time.monotonic()
+        try:
+            importer.load(lines)
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+        elapsed = time.monotonic() - started
+        rows = sum(importer.loaded.values())
+        details = ", ".join(
+            f"{name}: {count}" for name, count in importer.loaded.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено строк: {rows} ({details}), пропущено: "
+            f"{importer.skipped}, скопировано картинок: {importer.copied} "
+            f"за {elapsed:.1f} с ({rows / max(elapsed, 1e-6):.0f} строк/с)"
+        ))
+        if options["skip_rebuild"]:
+            self.stdout.write(
+                "Не забудьте запустить repair_counters и rebuild_timelines."
+            )
+            return
+        # bulk_create не вызывает сигналы: счётчики, ленты и кэш лент
+        # приводим в порядок отдельно.
+        call_command("repair_counters", stdout=self.stdout)
+        call_command("rebuild_timelines", stdout=self.stdout)
+        cache.clear()
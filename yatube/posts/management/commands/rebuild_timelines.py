@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Follow, Timeline
+
+
+class Command(BaseCommand):
+    help = "Пересобирает ленты подписок (таблицу Timeline) с нуля."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", dest="usernames", action="append", default=[],
+            help="Пересобрать ленту только этого пользователя.",
+        )
+        parser.add_argument(
+            "--depth", type=int, default=settings.TIMELINE_BACKFILL,
+            help="Сколько последних постов каждого автора брать (0 — все).",
+        )
+
+    def handle(self, *args, **options):
+        follows = Follow.objects.order_by("user_id")
+        entries = Timeline.objects.all()
+        if options["usernames"]:
+            follows = follows.filter(user__username__in=options["usernames"])
+            entries = entries.filter(user__username__in=options["usernames"])
+        pairs = follows.values_list("user_id", "author_id").distinct()
+
+        with transaction.atomic():
+            deleted, _ = entries.delete()
+            rebuilt = 0
+            for user_id, author_id in pairs.iterator():
+                timeline.backfill(user_id, author_id, options["depth"])
+                rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Удалено записей: {deleted}, пересобрано подписок: {rebuilt}"
+        ))
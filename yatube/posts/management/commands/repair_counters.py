@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает денормализованные счётчики и чинит расхождения."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Сколько строк пересчитывать за одну транзакцию.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        users = counters.repair_users(batch_size)
+        posts = counters.repair_posts(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Исправлено счётчиков: пользователей {users}, постов {posts}"
+        ))
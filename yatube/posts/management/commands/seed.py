@@ -0,0 +1,204 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.transfer import explicit_dates
+
+# Пароль всех сгенерированных пользователей — для входа в нагрузочных тестах.
+PASSWORD = "seed-password"
+
+
+class Command(BaseCommand):
+    help = ("Генерирует тестовые данные: пользователей, группы, посты, "
+            "комментарии и подписки.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--comments", type=int, default=50000)
+        parser.add_argument(
+            "--follows", type=int, default=20,
+            help="Среднее число подписок на пользователя.",
+        )
+        parser.add_argument(
+            "--alpha", type=float, default=1.2,
+            help="Показатель степенного закона активности авторов.",
+        )
+        parser.add_argument(
+            "--days", type=int, default=365,
+            help="За сколько последних дней разбросать даты постов.",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--random-seed", type=int, default=None,
+            help="Зерно генератора для воспроизводимых данных.",
+        )
+        parser.add_argument(
+            "--skip-rebuild", action="store_true",
+            help="Не пересчитывать счётчики и ленты после генерации.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["random_seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.created = {}
+        started = time.monotonic()
+        with explicit_dates():
+            user_ids = self.seed_users(options["users"])
+            group_ids = self.seed_groups(options["groups"])
+            # Авторы отсортированы по «популярности»: вес i-го — 1 / i^alpha.
+            self.rng.shuffle(user_ids)
+            author_weights = list(accumulate(
+                1 / rank ** options["alpha"]
+                for rank in range(1, len(user_ids) + 1)
+            ))
+            post_ids = self.seed_posts(
+                options["posts"], user_ids, author_weights, group_ids,
+                options["days"],
+            )
+            self.seed_comments(options["comments"], post_ids, user_ids)
+            self.seed_follows(options["follows"], user_ids, author_weights)
+        elapsed = time.monotonic() - started
+        total = sum(self.created.values())
+        details = ", ".join(
+            f"{name}: {count}" for name, count in self.created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано строк: {total} ({details}) за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-6):.0f} строк/с)"
+        ))
+        if options["skip_rebuild"]:
+            self.stdout.write(
+                "Не забудьте запустить repair_counters и rebuild_timelines."
+            )
+            return
+        # bulk_create не вызывает сигналы: счётчики, ленты и кэш лент
+        # приводим в порядок отдельно.
+        call_command("repair_counters", stdout=self.stdout)
+        call_command("rebuild_timelines", stdout=self.stdout)
+        cache.clear()
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def seed_users(self, count):
+        first = (User.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        password = make_password(PASSWORD)
+        names = []
+        for size in self.batches(count):
+            with mixer.ctx(commit=False):
+                users = mixer.cycle(size).blend(
+                    User,
+                    username=mixer.sequence(
+                        lambda n: f"seed{first + len(names) + n}"
+                    ),
+                    password=password,
+                    is_staff=False,
+                    is_superuser=False,
+                )
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            names += [user.username for user in users]
+        self.created["user"] = count
+        # На SQLite bulk_create не возвращает ключи: перечитываем их.
+        return list(
+            User.objects.filter(pk__gte=first).values_list("pk", flat=True)
+        )
+
+    def seed_groups(self, count):
+        first = (Group.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        with mixer.ctx(commit=False):
+            groups = mixer.cycle(count).blend(
+                Group,
+                slug=mixer.sequence(lambda n: f"seed-{first + n}"),
+                title=mixer.sequence(
+                    lambda n: f"{mixer.faker.word().title()} {first + n}"
+                ),
+            )
+        Group.objects.bulk_create(groups)
+        self.created["group"] = count
+        return list(
+            Group.objects.filter(pk__gte=first).values_list("pk", flat=True)
+        )
+
+    def seed_posts(self, count, user_ids, weights, group_ids, days):
+        first = (Post.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        seconds = days * 24 * 60 * 60
+        next_id = first
+        for size in self.batches(count):
+            authors = self.rng.choices(user_ids, cum_weights=weights, k=size)
+            with mixer.ctx(commit=False):
+                posts = mixer.cycle(size).blend(
+                    Post, author=mixer.SKIP, group=mixer.SKIP, image=""
+                )
+            for post, author_id in zip(posts, authors):
+                # Ключи задаём сами, чтобы потом не перечитывать их.
+                post.id = next_id
+                next_id += 1
+                post.author_id = author_id
+                post.pub_date = self.now - timedelta(
+                    seconds=self.rng.randrange(seconds)
+                )
+                if group_ids and self.rng.random() < 0.5:
+                    post.group_id = self.rng.choice(group_ids)
+            with transaction.atomic():
+                Post.objects.bulk_create(posts)
+        self.created["post"] = count
+        return range(first, first + count)
+
+    def seed_comments(self, count, post_ids, user_ids):
+        if not post_ids:
+            return
+        for size in self.batches(count):
+            with mixer.ctx(commit=False):
+                comments = mixer.cycle(size).blend(
+                    Comment, post=mixer.SKIP, author=mixer.SKIP
+                )
+            for comment in comments:
+                comment.post_id = self.rng.choice(post_ids)
+                comment.author_id = self.rng.choice(user_ids)
+                comment.created = self.now - timedelta(
+                    seconds=self.rng.randrange(24 * 60 * 60)
+                )
+            with transaction.atomic():
+                Comment.objects.bulk_create(comments)
+        self.created["comment"] = count
+
+    def seed_follows(self, average, user_ids, weights):
+        # На популярных авторов подписываются чаще: тот же степенной закон.
+        created = 0
+        pairs = []
+        for user_id in user_ids:
+            size = min(self.rng.randint(0, 2 * average), len(user_ids) - 1)
+            authors = set(
+                self.rng.choices(user_ids, cum_weights=weights, k=size)
+            )
+            authors.discard(user_id)
+            pairs += [(user_id, author_id) for author_id in authors]
+            if len(pairs) >= self.batch_size:
+                created += self._save_follows(pairs)
+                pairs = []
+        created += self._save_follows(pairs)
+        self.created["follow"] = created
+
+    def _save_follows(self, pairs):
+        with transaction.atomic():
+            Follow.objects.bulk_create(
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in pairs
+            )
+        return len(pairs)
@@ -0,0 +1,61 @@
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+def _init_worker():
+    django.setup()
+
+
+def _warm(name):
+    from posts import thumbnails
+
+    try:
+        return "done" if thumbnails.generate(name) else "missing"
+    except Exception:
+        return "failed"
+
+
+class Command(BaseCommand):
+    help = "Заранее создаёт миниатюры для всех постов с картинками."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=multiprocessing.cpu_count(),
+            help="Число процессов-обработчиков.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=50,
+            help="Сколько картинок отдавать процессу за раз.",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        chunk_size = options["chunk_size"]
+        names = Post.objects.exclude(image="").order_by().values_list(
+            "image", flat=True).distinct().iterator()
+        started = time.monotonic()
+        stats = Counter()
+        # spawn: дочерним процессам не достаются открытые соединения с БД.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        ) as pool:
+            while True:
+                batch = list(islice(names, workers * chunk_size * 4))
+                if not batch:
+                    break
+                stats.update(pool.map(_warm, batch, chunksize=chunk_size))
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: {stats['done']}, без исходного файла: "
+            f"{stats['missing']}, с ошибкой: {stats['failed']}, "
+            f"за {time.monotonic() - started:.1f} с"
+        ))
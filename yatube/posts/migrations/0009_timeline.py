@@ -0,0 +1,99 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Сколько последних постов автора кладём в ленту подписчика (как
+# TIMELINE_BACKFILL на момент миграции) и сколько строк пишем за раз
+BACKFILL_DEPTH = 100
+BATCH_SIZE = 1000
+
+
+def fill_timelines(apps, schema_editor):
+    """Заполняет ленты по существующим подпискам.
+
+    Пары упорядочены по автору: его последние посты читаются один раз
+    на всех подписчиков.
+    """
+    alias = schema_editor.connection.alias
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    Timeline = apps.get_model("posts", "Timeline")
+    pairs = (
+        Follow.objects.using(alias)
+        .order_by("author_id", "user_id")
+        .values_list("author_id", "user_id")
+        .distinct()
+    )
+    current_author, posts, batch = None, [], []
+    for author_id, user_id in pairs.iterator():
+        if author_id != current_author:
+            current_author = author_id
+            posts = list(
+                Post.objects.using(alias)
+                .filter(author_id=author_id)
+                .order_by("-pub_date", "-id")
+                .values_list("id", "pub_date")[:BACKFILL_DEPTH]
+            )
+        batch.extend(
+            Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        )
+        if len(batch) >= BATCH_SIZE:
+            Timeline.objects.using(alias).bulk_create(batch)
+            batch = []
+    Timeline.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0008_follow"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Timeline",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("pub_date", models.DateTimeField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to="posts.Post",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="timeline",
+            index=models.Index(
+                fields=["user", "-pub_date", "-post"], name="timeline_user_pub_date_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="timeline",
+            unique_together={("user", "post")},
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+from django.db import migrations
+
+# Полнотекстовый индекс держат в актуальном состоянии триггеры SQLite,
+# поэтому он не расходится с таблицами и при bulk_create/update().
+INDEX_ROW = """
+    INSERT INTO posts_search (rowid, text, group_title, group_description)
+    SELECT NEW.id, NEW.text, g.title, g.description
+    FROM (SELECT 1) LEFT JOIN posts_group g ON g.id = NEW.group_id;
+"""
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE posts_search USING fts5(
+        text, group_title, group_description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER posts_search_insert AFTER INSERT ON posts_post BEGIN
+        {INDEX_ROW}
+    END
+    """,
+    f"""
+    CREATE TRIGGER posts_search_update AFTER UPDATE OF text, group_id
+    ON posts_post BEGIN
+        DELETE FROM posts_search WHERE rowid = OLD.id;
+        {INDEX_ROW}
+    END
+    """,
+    """
+    CREATE TRIGGER posts_search_delete AFTER DELETE ON posts_post BEGIN
+        DELETE FROM posts_search WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER posts_search_group_update
+    AFTER UPDATE OF title, description ON posts_group BEGIN
+        UPDATE posts_search
+        SET group_title = NEW.title, group_description = NEW.description
+        WHERE rowid IN (SELECT id FROM posts_post WHERE group_id = NEW.id);
+    END
+    """,
+    """
+    INSERT INTO posts_search (rowid, text, group_title, group_description)
+    SELECT p.id, p.text, g.title, g.description
+    FROM posts_post p LEFT JOIN posts_group g ON g.id = p.group_id
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS posts_search_group_update",
+    "DROP TRIGGER IF EXISTS posts_search_delete",
+    "DROP TRIGGER IF EXISTS posts_search_update",
+    "DROP TRIGGER IF EXISTS posts_search_insert",
+    "DROP TABLE IF EXISTS posts_search",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0011_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:43
+
+from django.db import migrations, models, transaction
+from django.db.models import Count, F, Min
+
+# Сколько пар (user, author) с дубликатами чистить за одну транзакцию
+BATCH_SIZE = 500
+
+
+def _decrease(stats, field, delta):
+    stats.filter(**{f"{field}__gte": delta}).update(**{field: F(field) - delta})
+
+
+def deduplicate_follows(apps, schema_editor):
+    """Оставляет у каждой пары (user, author) самую раннюю подписку.
+
+    Счётчики росли на каждый дубликат, поэтому уменьшаем и их.
+    """
+    alias = schema_editor.connection.alias
+    Follow = apps.get_model("posts", "Follow")
+    UserStats = apps.get_model("posts", "UserStats")
+    follows = Follow.objects.using(alias)
+    stats = UserStats.objects.using(alias)
+    duplicated = (
+        follows.order_by()
+        .values("user_id", "author_id")
+        .annotate(keep=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    while True:
+        batch = list(duplicated[:BATCH_SIZE])
+        if not batch:
+            return
+        with transaction.atomic(using=alias):
+            for pair in batch:
+                follows.filter(
+                    user_id=pair["user_id"], author_id=pair["author_id"]
+                ).exclude(id=pair["keep"]).delete()
+                extra = pair["total"] - 1
+                _decrease(stats.filter(pk=pair["user_id"]), "following_count", extra)
+                _decrease(stats.filter(pk=pair["author_id"]), "followers_count", extra)
+
+
+class Migration(migrations.Migration):
+    # Иначе пачки шли бы точками сохранения внутри одной транзакции
+    # миграции и держали блокировки до её конца.
+    atomic = False
+
+    dependencies = [
+        ("posts", "0012_post_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_follows, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="follow",
+            name="follow_user_author_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="follow",
+            constraint=models.UniqueConstraint(
+                fields=("user", "author"), name="follow_unique_user_author"
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations, models
+
+
+def _version_field():
+    field = models.PositiveIntegerField(default=1, editable=False)
+    field.set_attributes_from_name("version")
+    return field
+
+
+def add_version(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    field = _version_field()
+    if schema_editor.connection.vendor != "sqlite":
+        schema_editor.add_field(Post, field)
+        return
+    # Django пересоздаёт таблицу SQLite при AddField, и вместе со старой
+    # таблицей пропали бы триггеры полнотекстового индекса (0012).
+    # ADD COLUMN их сохраняет и не копирует таблицу.
+    table = Post._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        columns = schema_editor.connection.introspection.get_table_description(
+            cursor, table
+        )
+    if any(column.name == field.column for column in columns):
+        # Колонка осталась после отката: remove_version её не удаляет.
+        return
+    definition, _ = schema_editor.column_sql(Post, field)
+    schema_editor.execute(
+        f"ALTER TABLE {schema_editor.quote_name(table)} "
+        f"ADD COLUMN {schema_editor.quote_name(field.column)} {definition} "
+        f"DEFAULT 1"
+    )
+
+
+def remove_version(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    if schema_editor.connection.vendor != "sqlite":
+        schema_editor.remove_field(Post, _version_field())
+    # В SQLite колонку не удалить без пересоздания таблицы: оставляем.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0013_follow_unique"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(add_version, remove_version),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name="post",
+                    name="version",
+                    field=_version_field(),
+                ),
+            ],
+        ),
+    ]
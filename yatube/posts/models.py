@@ -29,10 +29,41 @@ class Post(models.Model):
         related_name="posts",
     )
     image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Растёт при каждом сохранении; входит в ключ кэша карточки поста.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx",
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Правка в post_edit или в админке — новая версия карточки.
+        # Увеличиваем в базе: две параллельные правки не получат
+        # одну и ту же версию.
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        self.version = models.F("version") + 1
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=["version"])
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -51,6 +82,12 @@ class Comment(models.Model):
     class Meta:
 
         ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=["post", "-created", "-id"],
+                name="comment_post_created_idx",
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -62,3 +99,47 @@ class Follow(models.Model):
     author = models.ForeignKey(
         User, related_name="following", on_delete=models.CASCADE,
     )
+
+    class Meta:
+        # Уникальный индекс заменяет прежний обычный по (user, author).
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="follow_unique_user_author",
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name="stats",
+        on_delete=models.CASCADE,
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+
+class Timeline(models.Model):
+    """Материализованная лента подписок: строка на каждый пост автора,
+    на которого подписан пользователь."""
+
+    user = models.ForeignKey(
+        User, related_name="timeline", on_delete=models.CASCADE,
+    )
+    post = models.ForeignKey(
+        Post, related_name="timeline_entries", on_delete=models.CASCADE,
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "post")
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_pub_date_idx",
+            ),
+        ]
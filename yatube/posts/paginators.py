@@ -0,0 +1,288 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from . import caching
+
+PageLink = namedtuple("PageLink", "number query")
+
+
+class LazyRows(Sequence):
+    """Строки страницы, которые читаются из базы при первом обращении."""
+
+    def __init__(self, load):
+        self._load = load
+        self._rows = None
+
+    def resolve(self):
+        if self._rows is None:
+            self._rows = self._load()
+        return self._rows
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __getitem__(self, index):
+        return self.resolve()[index]
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (keyset) без COUNT(*) и OFFSET.
+
+    Первые страницы доступны по ``?page=N``, дальше навигация идёт
+    по непрозрачным токенам ``?cursor=``.
+    """
+
+    ordering = ("-pub_date", "-id")
+
+    def __init__(self, object_list, per_page, offset_limit=None,
+                 count_key=None):
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+        if offset_limit is None:
+            offset_limit = settings.PAGE_OFFSET_LIMIT
+        self.offset_limit = offset_limit
+        self.count_key = count_key
+        self._next_cursor = None
+        self._previous_cursor = None
+        self._has_next = False
+        self._number = 1
+        self._pending = None
+
+    @cached_property
+    def key_fields(self):
+        return tuple(field.lstrip("-") for field in self.ordering)
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return max(caching.feed_count(self.count_key, self.object_list), 0)
+
+    def _resolve(self):
+        # Состояние пагинатора известно только после чтения строк.
+        if self._pending is not None:
+            self._pending.resolve()
+
+    @property
+    def next_cursor(self):
+        self._resolve()
+        return self._next_cursor
+
+    @property
+    def previous_cursor(self):
+        self._resolve()
+        return self._previous_cursor
+
+    @property
+    def num_pages(self):
+        # Точное число страниц не считаем: знаем только, есть ли следующая.
+        self._resolve()
+        return self._number + 1 if self._has_next else self._number
+
+    @cached_property
+    def total_pages(self):
+        """Оценка числа страниц по закэшированному счётчику ленты."""
+        pages = -(-self.count // self.per_page)
+        return max(pages, self.num_pages)
+
+    @property
+    def page_window(self):
+        """Ссылки на ближайшие к текущей страницы, не больше
+        2 * PAGE_WINDOW + 1 штук."""
+        self._resolve()
+        number = self._number
+        radius = settings.PAGE_WINDOW
+        links = []
+        for i in range(max(number - radius, 1),
+                       min(number + radius, self.total_pages) + 1):
+            if i == number:
+                links.append(PageLink(i, None))
+            elif i == number - 1 and self.previous_cursor:
+                links.append(PageLink(i, f"cursor={self.previous_cursor}"))
+            elif i == number + 1 and self.next_cursor:
+                links.append(PageLink(i, f"cursor={self.next_cursor}"))
+            elif i <= self.offset_limit:
+                links.append(PageLink(i, f"page={i}"))
+        return links
+
+    def get_page(self, number=None, cursor=None):
+        if cursor:
+            position = self.decode_cursor(cursor)
+            if position is not None:
+                return self._page_from_cursor(*position)
+        return self._page_from_offset(self._offset_number(number))
+
+    def get_lazy_page(self, number=None, cursor=None):
+        """Как get_page, но без запроса, пока страницу не читают.
+
+        Нужна лентам: на попадании в {% cache %} шаблон страницу не
+        трогает, и запрос к базе не выполняется.
+        """
+        page = Page(None, self._requested_number(number, cursor), self)
+
+        def load():
+            self._pending = None
+            loaded = self.get_page(number, cursor)
+            page.number = loaded.number
+            return loaded.object_list
+
+        page.object_list = self._pending = LazyRows(load)
+        return page
+
+    def cache_position(self, number=None, cursor=None):
+        """Позиция страницы для ключа кэша.
+
+        Строится по разобранному курсору и номеру после ограничения:
+        мусорный курсор и ``?page=999`` дают ту же позицию, что и
+        страница, которая на самом деле будет показана.
+        """
+        position = self.decode_cursor(cursor) if cursor else None
+        if position is None:
+            return f"page={self._offset_number(number)}"
+        number, reverse, (date, pk) = position
+        return f"cursor={number},{int(reverse)},{date.isoformat()},{pk}"
+
+    def _offset_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        return min(max(number, 1), self.offset_limit)
+
+    def _requested_number(self, number, cursor):
+        position = self.decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self._offset_number(number)
+        number, reverse, _ = position
+        return max(number, 2) if reverse else number
+
+    def encode_cursor(self, obj, number, reverse=False):
+        values = [self._key_value(obj, field) for field in self.key_fields]
+        payload = json.dumps(
+            [number, int(reverse)] + [str(value) for value in values]
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            number, reverse, *values = payload
+            number = int(number)
+        except (binascii.Error, OverflowError, TypeError, ValueError):
+            # OverflowError: json читает Infinity, а int() его не берёт.
+            return None
+        if number < 1 or len(values) != len(self.key_fields):
+            return None
+        try:
+            date = parse_datetime(values[0])
+            values = [date] + [int(value) for value in values[1:]]
+        except (TypeError, ValueError):
+            return None
+        if date is None:
+            return None
+        return number, bool(reverse), values
+
+    def prepare(self, objects):
+        """Преобразует строки страницы в объекты для шаблона."""
+        return objects
+
+    def _key_value(self, obj, field):
+        if isinstance(obj, dict):
+            value = obj[field]
+        else:
+            value = getattr(obj, field)
+        return value.isoformat() if hasattr(value, "isoformat") else value
+
+    def _after(self, values):
+        date_field, id_field = self.key_fields
+        date, pk = values
+        return self.object_list.filter(
+            **{f"{date_field}__lte": date}
+        ).exclude(**{date_field: date, f"{id_field}__gte": pk})
+
+    def _before(self, values):
+        date_field, id_field = self.key_fields
+        date, pk = values
+        return self.object_list.filter(
+            **{f"{date_field}__gte": date}
+        ).exclude(**{date_field: date, f"{id_field}__lte": pk}).reverse()
+
+    def _page_from_offset(self, number):
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return self._build_page(rows, number)
+
+    def _page_from_cursor(self, number, reverse, values):
+        if not reverse:
+            rows = list(self._after(values)[:self.per_page + 1])
+            return self._build_page(rows, number)
+        rows = list(self._before(values)[:self.per_page + 1])
+        if len(rows) <= self.per_page:
+            # Новее записей нет — это и есть первая страница.
+            return self._page_from_offset(1)
+        rows = rows[:self.per_page][::-1]
+        rows.append(None)
+        return self._build_page(rows, max(number, 2))
+
+    def _build_page(self, rows, number):
+        self._has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        self._number = number
+        if rows and self._has_next:
+            self._next_cursor = self.encode_cursor(rows[-1], number + 1)
+        if rows and number > 1:
+            self._previous_cursor = self.encode_cursor(
+                rows[0], number - 1, reverse=True
+            )
+        return Page(self.prepare(rows), number, self)
+
+
+class CommentPaginator(CursorPaginator):
+    """Комментарии поста, новые сверху.
+
+    Число комментариев берётся из Post.comments_count, без COUNT(*).
+    """
+
+    ordering = ("-created", "-id")
+
+    def __init__(self, object_list, per_page, total=0):
+        super().__init__(object_list, per_page)
+        self.total = total
+
+    @cached_property
+    def count(self):
+        return self.total
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок: читаем строки Timeline, отдаём посты."""
+
+    ordering = ("-pub_date", "-post_id")
+
+    def prepare(self, objects):
+        return [entry.post for entry in objects]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки без COUNT(*) по всей таблице.
+
+    Без фильтров число строк оценивается по максимальному первичному
+    ключу, с фильтрами считается не дальше ADMIN_COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = queryset.order_by().aggregate(last=Max("pk"))["last"]
+            return estimate or 0
+        return queryset.order_by()[:limit].count()
@@ -0,0 +1,117 @@
+import base64
+import binascii
+import json
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+# Веса колонок для bm25: текст поста, название и описание группы.
+WEIGHTS = (10.0, 4.0, 1.0)
+RANK_SQL = "bm25(posts_search, {}, {}, {})".format(*WEIGHTS)
+SNIPPET_WORDS = 16
+# Маркеры совпадений не встречаются в тексте постов и переживают escape().
+MARK_START, MARK_END = "\x02", "\x03"
+
+
+def match_expression(query, column=None):
+    """Запрос FTS5 из пользовательского ввода.
+
+    Все слова обязательны, последнее ищется по префиксу. Операторы
+    FTS5 из ввода не пропускаем. column ограничивает поиск одной
+    колонкой индекса.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    expression = " ".join(terms)
+    if column is not None:
+        expression = f"{column} : ({expression})"
+    return expression
+
+
+class MatchingPostIds(RawSQL):
+    """id постов под запрос FTS5 для фильтра ``pk__in``.
+
+    RawSQL берёт SQL в скобки, и lookup in добавляет ещё одни: SQLite
+    читает ``IN ((SELECT …))`` как скалярный подзапрос — одну строку.
+    """
+
+    def __init__(self, expression):
+        super().__init__(
+            "SELECT rowid FROM posts_search WHERE posts_search MATCH %s",
+            [expression],
+        )
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def encode_cursor(rank, post_id):
+    payload = json.dumps([rank, post_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        rank, post_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(post_id)
+    except (binascii.Error, TypeError, ValueError):
+        return None
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, "<mark>")
+        .replace(MARK_END, "</mark>")
+    )
+
+
+def search_posts(query, limit, cursor=None):
+    """Посты по релевантности (bm25) с подсвеченными фрагментами.
+
+    Страницы листаются по ключу (rank, id). Возвращает посты и курсор
+    следующей страницы либо None.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return [], None
+    sql = (
+        f"SELECT rowid, {RANK_SQL} AS rank, "
+        f"snippet(posts_search, 0, %s, %s, '…', {SNIPPET_WORDS}) "
+        f"FROM posts_search WHERE posts_search MATCH %s"
+    )
+    params = [MARK_START, MARK_END, expression]
+    after = decode_cursor(cursor) if cursor else None
+    if after is not None:
+        sql += f" AND ({RANK_SQL}, rowid) > (%s, %s)"
+        params += after
+    sql += " ORDER BY rank, rowid LIMIT %s"
+    params.append(limit + 1)
+    with connection.cursor() as db:
+        db.execute(sql, params)
+        rows = db.fetchall()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    posts = Post.objects.select_related("author", "group").in_bulk(
+        [row[0] for row in rows]
+    )
+    results = []
+    for post_id, rank, snippet in rows:
+        post = posts.get(post_id)
+        if post is None:
+            continue
+        post.search_snippet = highlight(snippet)
+        results.append(post)
+    next_cursor = None
+    if has_next:
+        post_id, rank, snippet = rows[-1]
+        next_cursor = encode_cursor(rank, post_id)
+    return results, next_cursor
@@ -0,0 +1,191 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from jobs import queue
+
+from . import caching, counters, follows, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User
+
+# Поля пользователя, которые видны на карточках его постов
+CARD_USER_FIELDS = ("username", "first_name", "last_name")
+
+
+def _remember_state(instance):
+    # Отложенные (deferred) поля не трогаем, чтобы не делать запросов.
+    values = instance.__dict__
+    if "group_id" in values:
+        instance._loaded_group_id = values["group_id"]
+    if "image" in values:
+        instance._loaded_image = getattr(
+            values["image"], "name", values["image"]
+        )
+
+
+def _after_commit(func, *args):
+    # Сброс кэша до COMMIT не защищает: параллельный запрос успеет
+    # прочитать старые данные и положить их в кэш заново.
+    transaction.on_commit(lambda: func(*args))
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    # Запоминаем группу, чтобы при переносе поста сбросить и старую ленту.
+    _remember_state(instance)
+
+
+def _followers_or_job(post, job_name, **kwargs):
+    """Подписчики автора поста, если их не больше
+    TIMELINE_FANOUT_INLINE_LIMIT.
+
+    Иначе ставит задачу job_name, которая обойдёт их ленты, и
+    возвращает пустой список.
+    """
+    limit = settings.TIMELINE_FANOUT_INLINE_LIMIT
+    # Чтобы решить, обходить ли ленты сразу, хватит limit + 1 строки.
+    follower_ids = list(timeline.followers(post.author_id)[:limit + 1])
+    if len(follower_ids) <= limit:
+        return follower_ids
+    # Большой обход лент подписчиков не делаем в запросе.
+    queue.enqueue(job_name, **kwargs)
+    return []
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.author_id, "posts_count", 1)
+        follower_ids = _followers_or_job(
+            instance, "posts.fan_out", post_id=instance.id
+        )
+        if follower_ids:
+            timeline.fan_out(instance, follower_ids)
+        caching.post_created(instance, follower_ids)
+    else:
+        caching.post_changed(
+            instance,
+            getattr(instance, "_loaded_group_id", instance.group_id),
+            _followers_or_job(
+                instance,
+                "posts.timelines_changed",
+                author_id=instance.author_id,
+            ),
+        )
+    image = instance.image.name
+    changed = image != getattr(instance, "_loaded_image", image)
+    if image and (created or changed):
+        thumbnails.schedule(image)
+    _remember_state(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    caching.post_deleted(
+        instance,
+        _followers_or_job(
+            instance,
+            "posts.timelines_changed",
+            author_id=instance.author_id,
+        ),
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, "posts_count", -1)
+
+
+def _fields_changed(instance, fields, update_fields):
+    # Старые значения читаем из базы: сохраняют группы и имена редко,
+    # а вход пользователя (last_login) сюда не доходит.
+    if instance._state.adding:
+        return False
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return False
+    old = type(instance)._default_manager.filter(
+        pk=instance.pk
+    ).values(*fields).first()
+    return old is not None and any(
+        old[field] != getattr(instance, field) for field in fields
+    )
+
+
+def _cards_changed(posts):
+    # Новая версия — новый ключ карточки; поколение лент сбросит
+    # фрагменты и ETag со старыми карточками.
+    posts.update(version=F("version") + 1)
+    _after_commit(caching.cards_changed)
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, update_fields, **kwargs):
+    if _fields_changed(instance, ("slug",), update_fields):
+        _cards_changed(Post.objects.filter(group=instance))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    # Название и описание группы — в шапке её ленты.
+    if not created:
+        _after_commit(caching.bump, caching.group_feed(instance.pk))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # SET_NULL у постов — один UPDATE без сигналов Post.
+    _cards_changed(Post.objects.filter(group=instance))
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields, **kwargs):
+    if _fields_changed(instance, CARD_USER_FIELDS, update_fields):
+        _cards_changed(Post.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments(instance.post_id, 1)
+    caching.bump(caching.post_feed(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments(instance.post_id, -1)
+    caching.bump(caching.post_feed(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        follows.followed.send(
+            sender, user_id=instance.user_id, author_ids=[instance.author_id]
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follows.unfollowed.send(
+        sender, user_id=instance.user_id, author_ids=[instance.author_id]
+    )
+
+
+@receiver(follows.followed)
+def authors_followed(sender, user_id, author_ids, **kwargs):
+    counters.change_user(user_id, "following_count", len(author_ids))
+    for author_id in author_ids:
+        counters.change_user(author_id, "followers_count", 1)
+        timeline.backfill(user_id, author_id)
+    _after_commit(caching.follow_changed, user_id, author_ids)
+
+
+@receiver(follows.unfollowed)
+def authors_unfollowed(sender, user_id, author_ids, **kwargs):
+    counters.change_user(user_id, "following_count", -len(author_ids))
+    for author_id in author_ids:
+        counters.change_user(author_id, "followers_count", -1)
+        timeline.prune(user_id, author_id)
+    _after_commit(caching.follow_changed, user_id, author_ids)
@@ -0,0 +1,22 @@
+from jobs.queue import job
+
+from . import caching, thumbnails, timeline
+from .models import Post
+
+
+@job("posts.thumbnails")
+def generate_thumbnails(name):
+    thumbnails.generate(name)
+
+
+@job("posts.fan_out")
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    caching.timelines_changed(timeline.fan_out(post))
+
+
+@job("posts.timelines_changed")
+def timelines_changed(author_id):
+    caching.timelines_changed(timeline.followers(author_id))
@@ -1,5 +1,10 @@
+from contextlib import contextmanager
+
 from django.contrib.auth import get_user_model
+from django.db import connection, connections
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from ..models import Group, Post
 
@@ -36,3 +41,33 @@ class ObjectsCreate:
     def group_create():
         group = Group.objects.create(slug="test_slug", title="group_title")
         return group
+
+
+class QueryBudgetMixin:
+    """Проверка, что страница укладывается в бюджет SQL-запросов."""
+
+    def assertQueryBudget(self, client, url_name, budget, kwargs=None,
+                          data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse(url_name, kwargs=kwargs), data)
+        executed = "\n".join(query["sql"] for query in queries)
+        self.assertLessEqual(
+            len(queries), budget,
+            f"{url_name}: {len(queries)} запросов при бюджете {budget}"
+            f"\n{executed}",
+        )
+        return response
+
+
+@contextmanager
+def run_on_commit(using="default"):
+    """Выполняет колбэки transaction.on_commit, заведённые внутри блока.
+
+    TestCase не коммитит транзакцию, и без этого сброс кэша после
+    подписки в тестах не случился бы никогда.
+    """
+    callbacks = connections[using].run_on_commit
+    start = len(callbacks)
+    yield
+    for _, callback in callbacks[start:]:
+        callback()
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        self.author = User.objects.create_user(username="writer")
+        self.groups = Group.objects.bulk_create(
+            Group(title=f"Группа {number}", slug=f"group-{number}")
+            for number in range(5)
+        )
+        Post.objects.bulk_create(
+            Post(text=f"Пост {number}", author=self.author,
+                 group=self.groups[number % 5])
+            for number in range(30)
+        )
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:posts_post_changelist")
+
+    def test_changelist_has_no_full_counts_or_group_selects(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        counts = [
+            query["sql"] for query in queries.captured_queries
+            if "COUNT(" in query["sql"]
+        ]
+        self.assertEqual(counts, [])
+        # Автокомплит рисует только выбранную группу, а не все группы.
+        self.assertNotContains(response, "Группа 4</option>\n<option")
+        self.assertContains(response, "admin-autocomplete")
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        Post.objects.bulk_create(
+            Post(text="Ещё пост", author=self.author) for _ in range(30)
+        )
+        with self.assertNumQueries(len(queries)):
+            self.client.get(self.url)
+
+    @override_settings(ADMIN_COUNT_LIMIT=5)
+    def test_search_uses_full_text_index_and_capped_count(self):
+        response = self.client.get(self.url, {"q": "пост"})
+        self.assertEqual(response.context["cl"].result_count, 5)
+        response = self.client.get(self.url, {"q": "Пост 17"})
+        self.assertEqual(
+            [post.text for post in response.context["cl"].result_list],
+            ["Пост 17"],
+        )
+
+    def test_search_matches_only_post_text(self):
+        group = Group.objects.create(
+            title="Редкая группа", slug="rare", description="Редкое слово"
+        )
+        Post.objects.create(text="Про другое", author=self.author, group=group)
+        Post.objects.create(text="Редкое слово в тексте", author=self.author)
+        response = self.client.get(self.url, {"q": "редкое"})
+        self.assertEqual(
+            [post.text for post in response.context["cl"].result_list],
+            ["Редкое слово в тексте"],
+        )
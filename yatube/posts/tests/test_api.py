@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_init
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+from .fixtures import QueryBudgetMixin, UsersCreate
+
+User = get_user_model()
+
+
+@override_settings(PAGE_COUNT=2)
+class ApiTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = UsersCreate.author_create()
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.posts = [
+            Post.objects.create(
+                text=f"Пост {number}", author=self.author, group=self.group
+            )
+            for number in range(5)
+        ]
+        self.client = Client()
+
+    def collect(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids += [post["id"] for post in data["results"]]
+            url = data["next"]
+        return ids
+
+    def test_feeds_are_paginated_by_cursor(self):
+        expected = [post.id for post in reversed(self.posts)]
+        urls = [
+            reverse("posts:api_index"),
+            reverse("posts:api_group_posts", args=[self.group.slug]),
+            reverse("posts:api_profile", args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.collect(url), expected)
+
+    def test_post_fields(self):
+        post = self.posts[0]
+        data = self.client.get(
+            reverse("posts:api_post_detail", args=[post.id])
+        ).json()
+        self.assertEqual(data["id"], post.id)
+        self.assertEqual(data["text"], "Пост 0")
+        self.assertEqual(data["author"], self.author.username)
+        self.assertEqual(data["group"], "group")
+        self.assertIsNone(data["image"])
+        self.assertEqual(data["pub_date"], post.pub_date.isoformat())
+        self.assertEqual(self.client.get(data["comments"]).status_code, 200)
+        response = self.client.get(reverse("posts:api_post_detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_feed(self):
+        url = reverse("posts:api_follow_index")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        reader = User.objects.create_user(username="reader")
+        Follow.objects.create(user=reader, author=self.author)
+        self.client.force_login(reader)
+        self.assertEqual(
+            self.collect(url), [post.id for post in reversed(self.posts)]
+        )
+
+    def test_conditional_get(self):
+        url = reverse("posts:api_index")
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_no_models_are_instantiated(self):
+        created = []
+
+        def count(sender, **kwargs):
+            created.append(sender)
+
+        post_init.connect(count, sender=Post)
+        try:
+            self.client.get(reverse("posts:api_index"))
+        finally:
+            post_init.disconnect(count, sender=Post)
+        self.assertEqual(created, [])
+        self.assertQueryBudget(self.client, "posts:api_index", 2)
@@ -1,4 +1,6 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..models import Comment
@@ -35,3 +37,69 @@ class TestComments(TestCase):
         Comment.objects.count() == comments_count + 1
         latest_comment = Comment.objects.first()
         self.assertEqual(latest_comment.text, form_data["text"])
+
+
+@override_settings(COMMENTS_PAGE_SIZE=3)
+class CommentPaginationTests(TestCase):
+    def setUp(self):
+        self.author = UsersCreate.author_create()
+        self.post = ObjectsCreate.post_create(None, self.author, TEXT)
+        self.client = UsersCreate.guest_client_create()
+        self.add_comments(5)
+
+    def add_comments(self, count):
+        start = Comment.objects.count()
+        Comment.objects.bulk_create(
+            Comment(
+                post=self.post, author=self.author, text=f"Комментарий {i}"
+            )
+            for i in range(start, start + count)
+        )
+
+    def texts(self, comments):
+        return [comment.text for comment in comments]
+
+    def test_post_detail_shows_newest_page(self):
+        response = self.client.get(
+            reverse("posts:post_detail", args=[self.post.id])
+        )
+        comments = response.context["comments"]
+        self.assertEqual(
+            self.texts(comments),
+            ["Комментарий 4", "Комментарий 3", "Комментарий 2"],
+        )
+        self.assertContains(response, "js-more-comments")
+        fragment = self.client.get(
+            reverse("posts:post_comments", args=[self.post.id]),
+            {"cursor": comments.paginator.next_cursor},
+        )
+        self.assertEqual(
+            self.texts(fragment.context["comments"]),
+            ["Комментарий 1", "Комментарий 0"],
+        )
+        self.assertNotContains(fragment, "js-more-comments")
+        self.assertNotContains(fragment, "<html")
+
+    def test_json_pages(self):
+        url = reverse("posts:post_comments", args=[self.post.id])
+        data = self.client.get(url, {"format": "json"}).json()
+        self.assertEqual(
+            [comment["text"] for comment in data["comments"]],
+            ["Комментарий 4", "Комментарий 3", "Комментарий 2"],
+        )
+        self.assertEqual(data["comments"][0]["author"], "post_author")
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(len(data["comments"]), 2)
+        self.assertIsNone(data["next"])
+
+    def test_missing_post(self):
+        response = self.client.get(reverse("posts:post_comments", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_query_count_does_not_depend_on_comments(self):
+        url = reverse("posts:post_detail", args=[self.post.id])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.add_comments(20)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(url)
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="writer")
+        self.reader = User.objects.create_user(username="reader")
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        self.author_client.post(
+            reverse("posts:post_create"), data={"text": "Пост"}
+        )
+        post = Post.objects.get(author=self.author)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.reader_client.post(
+            reverse("posts:add_comment", args=[post.id]),
+            data={"text": "Комментарий"},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        post.comments.get().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_follow_counters(self):
+        url = reverse("posts:profile_follow", args=[self.author.username])
+        self.reader_client.get(url)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.reader_client.get(
+            reverse("posts:profile_unfollow", args=[self.author.username])
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_repair_counters(self):
+        post = Post.objects.create(text="Пост", author=self.author)
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        Post.objects.filter(pk=post.pk).update(comments_count=3)
+        UserStats.objects.filter(user=self.reader).delete()
+        call_command("repair_counters", batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
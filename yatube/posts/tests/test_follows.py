@@ -0,0 +1,105 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import caching, follows
+from ..models import Follow, Post, Timeline, UserStats
+from .fixtures import run_on_commit
+
+User = get_user_model()
+
+
+class FollowsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username="reader")
+        self.authors = [
+            User.objects.create_user(username=f"author{i}") for i in range(3)
+        ]
+        for author in self.authors:
+            Post.objects.create(text=f"Пост {author.username}", author=author)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_duplicate_follow_is_rejected(self):
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.authors[0])
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        author = self.authors[0]
+        with run_on_commit():
+            self.assertTrue(follows.follow(self.reader.id, author.id))
+            self.assertFalse(follows.follow(self.reader.id, author.id))
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.stats(author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(Timeline.objects.filter(user=self.reader).count(), 1)
+        self.assertEqual(
+            caching.following_ids(self.reader.id), {author.id}
+        )
+
+        with run_on_commit():
+            self.assertTrue(follows.unfollow(self.reader.id, author.id))
+            self.assertFalse(follows.unfollow(self.reader.id, author.id))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.stats(author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+        self.assertEqual(caching.following_ids(self.reader.id), set())
+
+    def test_follow_many_skips_existing_self_and_missing(self):
+        follows.follow(self.reader.id, self.authors[0].id)
+        ids = [author.id for author in self.authors]
+        created = follows.follow_many(
+            self.reader.id, ids + [self.reader.id, 10 ** 6]
+        )
+        self.assertEqual(created, 2)
+        self.assertEqual(
+            set(Follow.objects.values_list("author_id", flat=True)), set(ids)
+        )
+        self.assertEqual(self.stats(self.reader).following_count, 3)
+        self.assertEqual(self.stats(self.authors[2]).followers_count, 1)
+        self.assertEqual(Timeline.objects.filter(user=self.reader).count(), 3)
+
+        self.assertEqual(follows.unfollow_many(self.reader.id, ids[1:]), 2)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(Timeline.objects.filter(user=self.reader).count(), 1)
+
+    def test_bulk_endpoint(self):
+        url = reverse("posts:api_follow_bulk")
+        data = {"author": ["author0", "author1", "nobody"]}
+        self.assertEqual(Client().post(url, data).status_code, 401)
+        client = Client()
+        client.force_login(self.reader)
+        self.assertEqual(client.get(url).status_code, 405)
+        response = client.post(url, data)
+        self.assertEqual(response.json(), {"action": "follow", "changed": 2})
+        response = client.post(url, {**data, "action": "unfollow"})
+        self.assertEqual(response.json(), {"action": "unfollow", "changed": 2})
+        response = client.post(url, {**data, "action": "block"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_follow_many_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as names:
+            names.write("author1\nauthor2\nnobody\n")
+            names.flush()
+            err = StringIO()
+            call_command(
+                "follow_many", "reader", "author0", file=names.name,
+                stdout=StringIO(), stderr=err,
+            )
+        self.assertIn("nobody", err.getvalue())
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 3)
+        call_command(
+            "follow_many", "reader", "author0", unfollow=True,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 2)
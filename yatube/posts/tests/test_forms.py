@@ -1,6 +1,13 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from posts.models import Group, Post
 
@@ -49,3 +56,85 @@ class TaskCreateFormTests(TestCase):
         )
         post_e.refresh_from_db()
         self.assertEqual(post_e.text, form_data["text"])
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_upload(size, orientation=None, name="photo.jpg"):
+    content = BytesIO()
+    image = Image.new("RGB", size, (10, 120, 200))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(content, "JPEG", exif=exif.tobytes())
+    return SimpleUploadedFile(name, content.getvalue(), "image/jpeg")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_DIMENSION=100)
+class ImageIngestTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create(username="test-user")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_image_is_reencoded(self):
+        # Ориентация 6: картинку нужно повернуть на 90 градусов.
+        self.client.post(
+            reverse("posts:post_create"),
+            data={"text": "Фото", "image": image_upload((400, 200), 6)},
+        )
+        post = Post.objects.get(text="Фото")
+        self.assertTrue(post.image.name.endswith(".jpg"))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (50, 100))
+            self.assertNotIn("exif", stored.info)
+            self.assertTrue(stored.info.get("progressive"))
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_oversized_upload_is_rejected(self):
+        response = self.client.post(
+            reverse("posts:post_create"),
+            data={"text": "Фото", "image": image_upload((400, 200))},
+        )
+        self.assertFalse(Post.objects.filter(text="Фото").exists())
+        self.assertTrue(response.context["form"].errors["image"])
+
+    def test_truncated_image_is_a_form_error(self):
+        upload = image_upload((400, 200))
+        upload = SimpleUploadedFile(
+            upload.name, upload.read()[:upload.size // 2], "image/jpeg"
+        )
+        response = self.client.post(
+            reverse("posts:post_create"),
+            data={"text": "Фото", "image": upload},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.filter(text="Фото").exists())
+        self.assertTrue(response.context["form"].errors["image"])
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_oversized_admin_upload_is_rejected(self):
+        admin = User.objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse("admin:posts_post_add"),
+            data={
+                "text": "Фото",
+                "author": self.user.id,
+                "image": image_upload((400, 200)),
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.filter(text="Фото").exists())
+        self.assertIn(
+            "Картинка больше",
+            response.context["adminform"].form.errors["image"][0],
+        )
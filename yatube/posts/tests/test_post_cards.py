@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..templatetags.post_cards import card_key, post_cards
+from .fixtures import run_on_commit
+
+User = get_user_model()
+
+
+class PostCardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="writer")
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.post = Post.objects.create(
+            text="Первый текст", author=self.author, group=self.group
+        )
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_version_grows_on_every_save(self):
+        self.assertEqual(self.post.version, 1)
+        self.client.post(
+            reverse("posts:post_edit", args=[self.post.id]),
+            {"text": "Правка", "group": self.group.id},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, 2)
+        self.post.save(update_fields=["text"])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, 3)
+
+    def test_concurrent_edits_get_distinct_versions(self):
+        first = Post.objects.get(pk=self.post.pk)
+        second = Post.objects.get(pk=self.post.pk)
+        first.save()
+        second.save()
+        self.assertEqual(first.version, 2)
+        self.assertEqual(second.version, 3)
+
+    def test_cards_are_shared_between_feeds(self):
+        self.client.get(reverse("posts:index"))
+        self.assertIsNotNone(cache.get(card_key(self.post)))
+        # Правка в обход модели не меняет версию: карточка берётся
+        # из кэша и в ленте группы, которую ещё никто не рендерил.
+        Post.objects.filter(pk=self.post.pk).update(text="Тайком")
+        response = self.client.get(
+            reverse("posts:group_posts", args=[self.group.slug])
+        )
+        self.assertContains(response, "Первый текст")
+        self.assertNotContains(response, "Тайком")
+
+    def test_edit_renders_new_card(self):
+        self.client.get(reverse("posts:index"))
+        self.post.text = "Новый текст"
+        self.post.save()
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, "Новый текст")
+        self.assertNotContains(response, "Первый текст")
+
+    def test_one_get_many_per_page(self):
+        posts = [self.post] + [
+            Post.objects.create(text=f"Пост {i}", author=self.author)
+            for i in range(3)
+        ]
+        post_cards(posts[:2])
+        with mock.patch.object(
+            cache, "get_many", wraps=cache.get_many
+        ) as get_many, self.assertNumQueries(0):
+            cards = post_cards(posts)
+        get_many.assert_called_once()
+        self.assertEqual(len(cards), 4)
+        self.assertIn("Первый текст", cards[0])
+        cached = cache.get_many([card_key(post) for post in posts])
+        self.assertEqual(len(cached), 4)
+
+    def test_card_render_is_not_counted_as_template(self):
+        with mock.patch("core.metrics.record_template") as record:
+            post_cards([self.post])
+        record.assert_not_called()
+
+    def test_group_slug_change_and_delete_refresh_cards(self):
+        url = reverse("posts:index")
+        etag = self.client.get(url)["ETag"]
+        self.group.slug = "new-slug"
+        with run_on_commit():
+            self.group.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, reverse("posts:group_posts", args=["new-slug"])
+        )
+        self.assertNotContains(
+            response, reverse("posts:group_posts", args=["group"])
+        )
+        with run_on_commit():
+            self.group.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "new-slug")
+
+    def test_author_rename_refreshes_cards(self):
+        url = reverse("posts:group_posts", args=[self.group.slug])
+        etag = self.client.get(url)["ETag"]
+        self.author.first_name = "Лев"
+        self.author.last_name = "Толстой"
+        with run_on_commit():
+            self.author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Лев Толстой")
@@ -0,0 +1,84 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, Timeline
+from ..paginators import (CommentPaginator, CursorPaginator,
+                          TimelinePaginator)
+
+User = get_user_model()
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN есть в SQLite")
+class FeedQueryPlanTests(TestCase):
+    """Запросы лент не должны сканировать таблицы и сортировать в памяти."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(username="writer")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.author, group=cls.group
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def assertUsesIndexes(self, queryset):
+        for detail in query_plan(queryset):
+            with self.subTest(detail=detail):
+                self.assertNotIn("TEMP B-TREE", detail)
+                if detail.startswith("SCAN"):
+                    self.assertIn("USING", detail)
+
+    def feed_pages(self, queryset, paginator_class=CursorPaginator):
+        paginator = paginator_class(queryset, settings.PAGE_COUNT)
+        values = [self.post.pub_date, self.post.id]
+        return (
+            paginator.object_list[:settings.PAGE_COUNT + 1],
+            paginator._after(values)[:settings.PAGE_COUNT + 1],
+            paginator._before(values)[:settings.PAGE_COUNT + 1],
+        )
+
+    def test_post_feeds(self):
+        feeds = {
+            "index": Post.objects.all(),
+            "group": self.group.posts.all(),
+            "profile": self.author.posts.all(),
+        }
+        for name, queryset in feeds.items():
+            for page in self.feed_pages(queryset):
+                with self.subTest(feed=name):
+                    self.assertUsesIndexes(page)
+
+    def test_follow_feed(self):
+        entries = Timeline.objects.filter(user=self.user)
+        for page in self.feed_pages(entries, TimelinePaginator):
+            self.assertUsesIndexes(page)
+
+    def test_comments(self):
+        self.assertUsesIndexes(self.post.comments.all())
+        self.assertUsesIndexes(Comment.objects.filter(post=self.post))
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text="Комментарий"
+        )
+        paginator = CommentPaginator(
+            self.post.comments.all(), settings.PAGE_COUNT
+        )
+        page = paginator._after([comment.created, comment.id])
+        self.assertUsesIndexes(page[:settings.PAGE_COUNT + 1])
+
+    def test_follow_lookups(self):
+        self.assertUsesIndexes(
+            Follow.objects.filter(user=self.user, author=self.author)
+        )
+        self.assertUsesIndexes(Follow.objects.filter(author=self.author))
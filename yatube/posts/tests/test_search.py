@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..search import search_posts
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="writer")
+        self.group = Group.objects.create(
+            title="Котоводы", slug="cats", description="Всё о кошках"
+        )
+        self.client = Client()
+
+    def found(self, query, limit=10, cursor=None):
+        posts, next_cursor = search_posts(query, limit, cursor)
+        return [post.id for post in posts], next_cursor
+
+    def test_results_are_ranked(self):
+        once = Post.objects.create(
+            text="Сегодня видел кошку и собаку", author=self.author
+        )
+        twice = Post.objects.create(
+            text="Кошку кормил, кошку гладил", author=self.author
+        )
+        Post.objects.create(text="Про собак", author=self.author)
+        self.assertEqual(self.found("кошку")[0], [twice.id, once.id])
+
+    def test_index_follows_post_and_group_changes(self):
+        post = Post.objects.create(text="Первый текст", author=self.author)
+        post.text = "Исправленный текст"
+        post.save()
+        self.assertEqual(self.found("первый")[0], [])
+        self.assertEqual(self.found("исправленный")[0], [post.id])
+        Post.objects.filter(pk=post.pk).update(group=self.group)
+        self.assertEqual(self.found("котоводы")[0], [post.id])
+        Group.objects.filter(pk=self.group.pk).update(title="Собаководы")
+        self.assertEqual(self.found("собаководы")[0], [post.id])
+        post.delete()
+        self.assertEqual(self.found("исправленный")[0], [])
+
+    def test_keyset_pagination(self):
+        posts = Post.objects.bulk_create(
+            Post(text=f"Заметка номер {number}", author=self.author)
+            for number in range(5)
+        )
+        seen = []
+        cursor = None
+        while True:
+            ids, cursor = self.found("заметка", limit=2, cursor=cursor)
+            seen += ids
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), len(posts))
+        self.assertEqual(len(set(seen)), len(posts))
+
+    def test_prefix_and_operators_in_query(self):
+        post = Post.objects.create(text="Программирование", author=self.author)
+        self.assertEqual(self.found("програм")[0], [post.id])
+        self.assertEqual(self.found('"NEAR( OR *')[0], [])
+        self.assertEqual(self.found("   ")[0], [])
+
+    @override_settings(PAGE_COUNT=1)
+    def test_search_view_highlights_and_escapes(self):
+        Post.objects.create(
+            text="<b>жирная</b> кошка и ещё кошка", author=self.author
+        )
+        Post.objects.create(text="Просто кошка", author=self.author)
+        url = reverse("posts:search")
+        first = self.client.get(url, {"q": "кошка"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.context["posts"]), 1)
+        second = self.client.get(
+            url, {"q": "кошка", "cursor": first.context["next_cursor"]}
+        )
+        self.assertIsNone(second.context["next_cursor"])
+        content = first.content.decode() + second.content.decode()
+        self.assertIn("&lt;b&gt;жирная&lt;/b&gt; <mark>кошка</mark>", content)
+        self.assertIn("Просто <mark>кошка</mark>", content)
+        self.assertNotIn("<b>жирная", content)
@@ -0,0 +1,51 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, Timeline, User, UserStats
+
+
+class SeedTests(TestCase):
+    def seed(self):
+        call_command(
+            "seed", users=50, groups=3, posts=400, comments=100, follows=5,
+            batch_size=64, random_seed=1, stdout=StringIO(),
+        )
+
+    def test_seed_creates_power_law_dataset(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 400)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(user=F("author")).exists())
+        per_author = sorted(
+            Post.objects.values("author").annotate(total=Count("id"))
+            .values_list("total", flat=True),
+            reverse=True,
+        )
+        # Самый активный автор пишет намного больше медианного.
+        self.assertGreater(per_author[0], 5 * per_author[len(per_author) // 2])
+        # Счётчики и ленты пересчитаны после вставки.
+        self.assertEqual(
+            sum(UserStats.objects.values_list("posts_count", flat=True)), 400
+        )
+        self.assertTrue(Timeline.objects.exists())
+
+    def test_benchmark_urls_report(self):
+        self.seed()
+        out = StringIO()
+        with self.assertLogs("django.request", "ERROR"):
+            call_command("benchmark_urls", repeat=2, warmup=0, stdout=out)
+        report = json.loads(out.getvalue())
+        index = report["urls"]["posts:index"]
+        self.assertEqual(index["status"], 200)
+        for key in ("p50_ms", "p95_ms", "queries", "bytes"):
+            self.assertIn(key, index)
+        self.assertIn("about:tech", report["urls"])
+        self.assertIn("users:login", report["urls"])
+        self.assertNotIn("posts:profile_follow", report["urls"])
@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from .. import thumbnails
+from ..management.commands.warm_thumbnails import _warm
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name="photo.png"):
+    content = BytesIO()
+    Image.new("RGB", (1200, 800), (200, 30, 30)).save(content, "PNG")
+    return SimpleUploadedFile(name, content.getvalue(), "image/png")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="writer")
+
+    def test_saving_post_with_image_schedules_thumbnails(self):
+        with mock.patch.object(thumbnails, "schedule") as schedule:
+            post = Post.objects.create(
+                text="Пост", author=self.author, image=image_file()
+            )
+            schedule.assert_called_once_with(post.image.name)
+            post.text = "Другой текст"
+            post.save()
+            schedule.assert_called_once()
+
+    def test_generate_creates_configured_geometries(self):
+        with mock.patch.object(thumbnails, "schedule"):
+            post = Post.objects.create(
+                text="Пост", author=self.author, image=image_file()
+            )
+        self.assertTrue(thumbnails.generate(post.image.name))
+        for geometry, options in settings.POST_THUMBNAILS:
+            thumbnail = get_thumbnail(post.image.name, geometry, **options)
+            self.assertTrue(thumbnail.exists())
+
+    def test_missing_source_is_skipped(self):
+        self.assertFalse(thumbnails.generate("posts/missing.jpg"))
+        self.assertEqual(_warm("posts/missing.jpg"), "missing")
@@ -0,0 +1,112 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import _create_cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs import queue
+from jobs.models import Job
+
+from .. import caching
+from ..models import Follow, Post, Timeline
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader")
+        self.author = User.objects.create_user(username="writer")
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    @override_settings(TIMELINE_FANOUT_INLINE_LIMIT=0)
+    def test_large_fan_out_is_deferred_to_job(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertFalse(Timeline.objects.filter(post=post).exists())
+        job = Job.objects.get(name="posts.fan_out")
+        self.assertTrue(queue.run_job(job.id))
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(list(response.context["page_obj"]), [post])
+
+    @override_settings(TIMELINE_FANOUT_INLINE_LIMIT=0)
+    def test_deferred_fan_out_invalidates_web_cache(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        url = reverse("posts:follow_index")
+        etag = self.client.get(url)["ETag"]
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        job = Job.objects.get(name="posts.fan_out")
+        # runworker — отдельный процесс со своим экземпляром кэша.
+        worker_cache = _create_cache("default")
+        self.assertNotIsInstance(worker_cache, LocMemCache)
+        with mock.patch.object(caching, "cache", worker_cache):
+            self.assertTrue(queue.run_job(job.id))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["page_obj"]), [post])
+
+    @override_settings(TIMELINE_FANOUT_INLINE_LIMIT=0)
+    def test_edit_and_delete_defer_follow_feeds_to_job(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="Пост", author=self.author)
+        queue.run_job(Job.objects.get(name="posts.fan_out").id)
+        url = reverse("posts:follow_index")
+        for change in (post.save, post.delete):
+            etag = self.client.get(url)["ETag"]
+            with CaptureQueriesContext(connection) as queries:
+                with mock.patch.object(caching, "bump") as bump:
+                    change()
+            # Подписчиков читаем не больше limit + 1.
+            follows = [
+                query["sql"] for query in queries
+                if "posts_follow" in query["sql"]
+            ]
+            self.assertEqual(len(follows), 1)
+            self.assertIn("LIMIT 1", follows[0])
+            self.assertNotIn(
+                caching.follow_feed(self.reader.id),
+                [feed for call in bump.call_args_list for feed in call[0]],
+            )
+            job = Job.objects.get(name="posts.timelines_changed")
+            self.assertTrue(queue.run_job(job.id))
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        post = Post.objects.create(text="Старый пост", author=self.author)
+        self.client.get(
+            reverse("posts:profile_follow", args=[self.author.username])
+        )
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(list(response.context["page_obj"]), [post])
+        self.client.get(
+            reverse("posts:profile_unfollow", args=[self.author.username])
+        )
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+
+    def test_rebuild_timelines(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(text=f"Пост {i}", author=self.author)
+            for i in range(3)
+        ]
+        Timeline.objects.all().delete()
+        call_command("rebuild_timelines", stdout=StringIO())
+        self.assertEqual(
+            set(Timeline.objects.values_list("post_id", flat=True)),
+            {post.id for post in posts},
+        )
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, Timeline, UserStats
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(SOURCE_MEDIA_ROOT, ignore_errors=True)
+
+    def export(self):
+        out = StringIO()
+        call_command("export_posts", stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def load(self, dump, **options):
+        path = os.path.join(SOURCE_MEDIA_ROOT, "dump.jsonl")
+        with open(path, "w", encoding="utf-8") as output:
+            output.write(dump)
+        out = StringIO()
+        call_command("import_posts", path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_round_trip_remaps_keys(self):
+        author = User.objects.create_user(username="writer")
+        reader = User.objects.create_user(username="reader")
+        group = Group.objects.create(title="Группа", slug="group")
+        pub_date = timezone.now() - timedelta(days=30)
+        post = Post.objects.create(text="Старый пост", author=author,
+                                   group=group, image="posts/photo.jpg")
+        Post.objects.filter(pk=post.pk).update(pub_date=pub_date)
+        Comment.objects.create(post=post, author=reader, text="Коммент")
+        Follow.objects.create(user=reader, author=author)
+        os.makedirs(os.path.join(SOURCE_MEDIA_ROOT, "posts"))
+        with open(os.path.join(SOURCE_MEDIA_ROOT, "posts", "photo.jpg"),
+                  "wb") as image:
+            image.write(b"jpeg")
+        dump = self.export()
+        self.assertEqual(len(dump.splitlines()), 6)
+
+        # В целевой базе уже есть другой автор и пост с тем же ключом.
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.filter(username="writer").delete()
+        other = User.objects.create_user(username="other")
+        Post.objects.create(text="Чужой пост", author=other)
+
+        report = self.load(dump, media_from=SOURCE_MEDIA_ROOT)
+        self.assertIn("строк/с", report)
+        imported = Post.objects.get(text="Старый пост")
+        self.assertEqual(imported.author.username, "writer")
+        self.assertEqual(imported.group.slug, "group")
+        self.assertEqual(imported.pub_date, pub_date)
+        self.assertEqual(imported.comments.get().author, reader)
+        self.assertEqual(imported.comments_count, 1)
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=imported.author).exists()
+        )
+        self.assertTrue(
+            Timeline.objects.filter(user=reader, post=imported).exists()
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=imported.author).posts_count, 1
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, "posts", "photo.jpg"))
+        )
+        # Повторная загрузка не дублирует пользователей, группы и подписки.
+        self.load(dump, skip_rebuild=True, batch_size=1)
+        self.assertEqual(User.objects.filter(username="writer").count(), 1)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
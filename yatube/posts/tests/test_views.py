@@ -1,14 +1,20 @@
+import base64
 import shutil
 import tempfile
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Follow, Group, Post
-from .fixtures import ObjectsCreate, UsersCreate
+from .. import caching
+from ..models import Comment, Follow, Group, Post
+from .fixtures import (ObjectsCreate, QueryBudgetMixin, UsersCreate,
+                       run_on_commit)
 
 User = get_user_model()
 
@@ -97,6 +103,101 @@ class TaskPaginatorsTests(TestCase):
                 self.assertEqual(len(response.context["page_obj"]), 3)
 
 
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_a = User.objects.create_user(username="user_a")
+        Post.objects.bulk_create(
+            Post(text=f"text{i}", author=cls.user_a) for i in range(25)
+        )
+        cls.ordered = list(Post.objects.order_by("-pub_date", "-id"))
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_next_and_previous_cursor(self):
+        response = self.guest_client.get(reverse("posts:index"))
+        paginator = response.context["page_obj"].paginator
+        self.assertIsNone(paginator.previous_cursor)
+        response = self.guest_client.get(
+            reverse("posts:index"), {"cursor": paginator.next_cursor}
+        )
+        page_obj = response.context["page_obj"]
+        self.assertEqual(page_obj.number, 2)
+        self.assertEqual(list(page_obj), self.ordered[10:20])
+        response = self.guest_client.get(
+            reverse("posts:index"),
+            {"cursor": page_obj.paginator.next_cursor},
+        )
+        page_obj = response.context["page_obj"]
+        self.assertEqual(list(page_obj), self.ordered[20:])
+        self.assertFalse(page_obj.has_next())
+        response = self.guest_client.get(
+            reverse("posts:index"),
+            {"cursor": page_obj.paginator.previous_cursor},
+        )
+        self.assertEqual(
+            list(response.context["page_obj"]), self.ordered[10:20]
+        )
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        response = self.guest_client.get(
+            reverse("posts:index"), {"cursor": "garbage"}
+        )
+        page_obj = response.context["page_obj"]
+        self.assertEqual(page_obj.number, 1)
+        self.assertEqual(list(page_obj), self.ordered[:10])
+
+    def test_infinite_cursor_number_falls_back_to_first_page(self):
+        payload = '[Infinity, 0, "2020-01-01T00:00:00+00:00", "1"]'
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:api_index"),
+            reverse("posts:post_comments", args=[self.ordered[0].id]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(PAGE_WINDOW=1)
+    def test_page_window_is_bounded(self):
+        cache.clear()
+        response = self.guest_client.get(reverse("posts:index"), {"page": 2})
+        paginator = response.context["page_obj"].paginator
+        self.assertEqual(paginator.total_pages, 3)
+        self.assertEqual(
+            [link.number for link in paginator.page_window], [1, 2, 3]
+        )
+        self.assertEqual(
+            paginator.page_window[2].query,
+            f"cursor={paginator.next_cursor}",
+        )
+
+    def test_feed_count_is_maintained_in_cache(self):
+        cache.clear()
+        self.assertEqual(caching.feed_count(caching.INDEX_FEED, Post.objects),
+                         25)
+        post = Post.objects.create(text="новый", author=self.user_a)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                caching.feed_count(caching.INDEX_FEED, Post.objects), 26
+            )
+        post.delete()
+        self.assertEqual(
+            caching.feed_count(caching.INDEX_FEED, Post.objects), 25
+        )
+
+    @override_settings(PAGE_OFFSET_LIMIT=2)
+    def test_page_number_is_limited(self):
+        response = self.guest_client.get(
+            reverse("posts:index"), {"page": 3}
+        )
+        self.assertEqual(response.context["page_obj"].number, 2)
+
+
 class AnotherGroupTests(TestCase):
     def setUp(self):
         self.author_p = User.objects.create_user(username="author_p")
@@ -229,12 +330,61 @@ class TestCache(TestCase):
 
     def test_cache(self):
         response = self.AUTHOR.get(reverse("posts:index"))
-        not_deleted = response.content
-        post_to_delete = Post.objects.first()
-        post_to_delete.delete()
+        cached = response.content
+        # Обновление в обход модели не сбрасывает кэш ленты.
+        Post.objects.filter(pk=self.POST.pk).update(text="другой текст")
         response = self.AUTHOR.get(reverse("posts:index"))
-        was_deleted = response.content
-        self.assertEqual(not_deleted, was_deleted)
+        self.assertEqual(cached, response.content)
+        self.POST.delete()
+        response = self.AUTHOR.get(reverse("posts:index"))
+        self.assertNotEqual(cached, response.content)
+        self.assertNotContains(response, "другой текст")
+
+    def test_cache_is_page_aware(self):
+        Post.objects.bulk_create(
+            Post(text=f"пост {i}", author=self.post_author)
+            for i in range(settings.PAGE_COUNT)
+        )
+        self.AUTHOR.get(reverse("posts:index"))
+        response = self.AUTHOR.get(reverse("posts:index"), {"page": 2})
+        self.assertContains(response, "текст поста")
+
+    def test_cache_hit_skips_feed_query(self):
+        cache.clear()
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_posts", args=[self.GROUP.slug]),
+            reverse("posts:profile", args=[self.post_author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.AUTHOR.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.AUTHOR.get(url)
+                self.assertContains(response, "текст поста")
+                self.assertFalse(
+                    any("posts_post" in q["sql"] for q in queries),
+                    "\n".join(q["sql"] for q in queries),
+                )
+
+    def test_equivalent_positions_share_fragment(self):
+        cache.clear()
+        url = reverse("posts:index")
+        limit = settings.PAGE_OFFSET_LIMIT
+        pairs = (
+            ({}, {"cursor": "мусор"}),
+            ({}, {"page": "abc"}),
+            ({"page": limit}, {"page": limit + 100}),
+        )
+        for first, second in pairs:
+            with self.subTest(second=second):
+                self.AUTHOR.get(url, first)
+                with CaptureQueriesContext(connection) as queries:
+                    self.AUTHOR.get(url, second)
+                self.assertFalse(
+                    any("posts_post" in q["sql"] for q in queries),
+                    "\n".join(q["sql"] for q in queries),
+                )
 
 
 class Testsubunsub(TestCase):
@@ -292,3 +442,158 @@ class Testsubunsub(TestCase):
         response = test_client.get(reverse("posts:follow_index"))
         post_text1 = response.context['page_obj'][0].text
         self.assertNotEqual(post.text, post_text1)
+
+
+class FollowStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username="reader")
+        self.author = User.objects.create_user(username="author")
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.profile_url = reverse("posts:profile", args=["author"])
+
+    def test_profile_shows_follow_state_from_cache(self):
+        response = self.client.get(self.profile_url)
+        self.assertFalse(response.context["following"])
+        self.assertContains(response, "Подписаться")
+
+        with run_on_commit():
+            self.client.get(reverse("posts:profile_follow", args=["author"]))
+        self.assertEqual(
+            caching.following_ids(self.reader.id), {self.author.id}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.profile_url)
+        self.assertTrue(response.context["following"])
+        self.assertContains(response, "Отписаться")
+        self.assertFalse(any("posts_follow" in q["sql"] for q in queries))
+
+        with run_on_commit():
+            self.client.get(
+                reverse("posts:profile_unfollow", args=["author"])
+            )
+        self.assertEqual(caching.following_ids(self.reader.id), set())
+        response = self.client.get(self.profile_url)
+        self.assertFalse(response.context["following"])
+
+    def test_repeated_follow_keeps_one_row(self):
+        for _ in range(2):
+            with run_on_commit():
+                self.client.get(
+                    reverse("posts:profile_follow", args=["author"])
+                )
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            caching.following_ids(self.reader.id), {self.author.id}
+        )
+
+    def test_stale_following_cache_does_not_block_unfollow(self):
+        # Множество попало в кэш до COMMIT подписки и устарело.
+        caching.following_ids(self.reader.id)
+        Follow.objects.create(user=self.reader, author=self.author)
+        with run_on_commit():
+            self.client.get(
+                reverse("posts:profile_unfollow", args=["author"])
+            )
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(caching.following_ids(self.reader.id), set())
+
+    def test_follow_index_without_follows_skips_timeline(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(len(response.context["page_obj"]), 0)
+        self.assertFalse(any("posts_timeline" in q["sql"] for q in queries))
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    # Число запросов не должно зависеть от количества постов на странице.
+    # С холодным кэшем сюда входят COUNT(*) ленты и поиск id для ETag.
+    BUDGETS = {
+        "posts:index": 4,
+        "posts:group_posts": 6,
+        "posts:profile": 6,
+        "posts:follow_index": 4,
+        "posts:post_detail": 5,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        authors = [
+            User.objects.create_user(username=f"author{i}") for i in range(3)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        for i in range(12):
+            post = Post.objects.create(
+                text=f"Пост {i}", author=authors[i % 3], group=cls.group
+            )
+            Comment.objects.create(
+                post=post, author=authors[(i + 1) % 3], text="Комментарий"
+            )
+        cls.post = post
+        cls.author = authors[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_feed_query_budgets(self):
+        kwargs = {
+            "posts:group_posts": {"slug": self.group.slug},
+            "posts:profile": {"username": self.author.username},
+            "posts:post_detail": {"post_id": self.post.id},
+        }
+        for url_name, budget in self.BUDGETS.items():
+            with self.subTest(url_name=url_name):
+                self.assertQueryBudget(
+                    self.client, url_name, budget, kwargs.get(url_name)
+                )
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="writer")
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.post = Post.objects.create(
+            text="Пост", author=self.author, group=self.group
+        )
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.urls = (
+            reverse("posts:index"),
+            reverse("posts:group_posts", args=[self.group.slug]),
+            reverse("posts:profile", args=[self.author.username]),
+            reverse("posts:post_detail", args=[self.post.id]),
+            reverse("posts:follow_index"),
+        )
+
+    def test_unchanged_page_is_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(
+                    any("posts_post" in q["sql"] for q in queries)
+                )
+
+    def test_write_changes_etag(self):
+        etags = {url: self.client.get(url)["ETag"] for url in self.urls}
+        Follow.objects.create(
+            user=User.objects.create_user(username="reader"),
+            author=self.author,
+        )
+        self.post.text = "Изменённый пост"
+        self.post.save()
+        for url in self.urls[:-1]:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from sorl.thumbnail import get_thumbnail
+
+from jobs import queue
+
+
+def generate(name):
+    """Создаёт все миниатюры картинки поста, которые рисуют шаблоны.
+
+    Возвращает True, если исходный файл найден.
+    """
+    if not name or not default_storage.exists(name):
+        return False
+    for geometry, options in settings.POST_THUMBNAILS:
+        get_thumbnail(name, geometry, **options)
+    return True
+
+
+def schedule(name):
+    """Создаёт миниатюры вне запроса, в фоновой задаче."""
+    queue.enqueue("posts.thumbnails", name=name)
@@ -0,0 +1,53 @@
+from django.conf import settings
+
+from .models import Follow, Post, Timeline
+
+
+def followers(author_id):
+    return Follow.objects.filter(
+        author_id=author_id
+    ).values_list("user_id", flat=True).distinct()
+
+
+def fan_out(post, follower_ids=None):
+    """Раскладывает новый пост в ленты всех подписчиков автора.
+
+    Возвращает id подписчиков.
+    """
+    if follower_ids is None:
+        follower_ids = list(followers(post.author_id))
+    Timeline.objects.bulk_create(
+        (
+            Timeline(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return follower_ids
+
+
+def backfill(user_id, author_id, depth=None):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if depth is None:
+        depth = settings.TIMELINE_BACKFILL
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        "-pub_date", "-id"
+    ).values_list("id", "pub_date")
+    if depth:
+        posts = posts[:depth]
+    Timeline.objects.bulk_create(
+        (
+            Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts.iterator()
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты после отписки."""
+    Timeline.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
@@ -0,0 +1,214 @@
+"""Перенос постов между окружениями в формате JSON Lines.
+
+Каждая строка — одна запись: {"model": "post", "id": 1, ...}. Модели
+выгружаются в порядке зависимостей, поэтому при загрузке внешние ключи
+всегда ссылаются на уже загруженные строки.
+"""
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post, User
+
+# Права (is_staff, is_superuser) между окружениями не переносим.
+MODELS = (
+    ("user", User, ("id", "username", "password", "first_name",
+                    "last_name", "email", "is_active", "date_joined")),
+    ("group", Group, ("id", "title", "slug", "description")),
+    ("post", Post, ("id", "text", "pub_date", "author_id", "group_id",
+                    "image")),
+    ("comment", Comment, ("id", "post_id", "author_id", "text", "created")),
+    ("follow", Follow, ("user_id", "author_id")),
+)
+
+
+def _encode(value):
+    # DjangoJSONEncoder обрезает время до миллисекунд, нам нужны все знаки.
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def export_lines(chunk_size):
+    """Строки выгрузки; таблицы читаются порциями по chunk_size."""
+    for name, model, fields in MODELS:
+        rows = model.objects.order_by("pk").values_list(*fields)
+        for row in rows.iterator(chunk_size=chunk_size):
+            record = {"model": name, **dict(zip(fields, row))}
+            yield json.dumps(record, default=_encode, ensure_ascii=False)
+
+
+@contextmanager
+def explicit_dates():
+    # auto_now_add перезаписал бы даты из выгрузки текущим временем.
+    fields = [
+        Post._meta.get_field("pub_date"),
+        Comment._meta.get_field("created"),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _max_pk(model):
+    return model.objects.aggregate(last=Max("pk"))["last"] or 0
+
+
+class Importer:
+    """Загружает записи выгрузки пачками по batch_size.
+
+    Пользователи сопоставляются по username, группы — по slug. Посты и
+    комментарии получают новые ключи со сдвигом на максимальный ключ
+    в базе, так что их внешние ключи пересчитываются без словарей.
+    """
+
+    def __init__(self, batch_size, media_from=None):
+        self.batch_size = batch_size
+        self.media_from = media_from
+        self.users = {}
+        self.groups = {}
+        self.post_offset = _max_pk(Post)
+        self.comment_offset = _max_pk(Comment)
+        self.skipped_posts = set()
+        self.loaded = {name: 0 for name, _, _ in MODELS}
+        self.skipped = 0
+        self.copied = 0
+        self._model = None
+        self._batch = []
+
+    def load(self, lines):
+        with explicit_dates():
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                model = record.pop("model")
+                if model != self._model or len(self._batch) >= self.batch_size:
+                    self.flush()
+                    self._model = model
+                self._batch.append(record)
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        with transaction.atomic():
+            getattr(self, f"_load_{self._model}s")(self._batch)
+        self._batch = []
+
+    def _load_users(self, rows):
+        names = [row["username"] for row in rows]
+        existing = set(
+            User.objects.filter(username__in=names).values_list(
+                "username", flat=True)
+        )
+        User.objects.bulk_create(
+            User(**{key: value for key, value in row.items() if key != "id"})
+            for row in rows if row["username"] not in existing
+        )
+        ids = dict(
+            User.objects.filter(username__in=names).values_list(
+                "username", "id")
+        )
+        for row in rows:
+            self.users[row["id"]] = ids[row["username"]]
+        self.loaded["user"] += len(rows) - len(existing)
+        self.skipped += len(existing)
+
+    def _load_groups(self, rows):
+        slugs = [row["slug"] for row in rows]
+        existing = set(
+            Group.objects.filter(slug__in=slugs).values_list("slug", flat=True)
+        )
+        Group.objects.bulk_create(
+            Group(**{key: value for key, value in row.items() if key != "id"})
+            for row in rows if row["slug"] not in existing
+        )
+        ids = dict(
+            Group.objects.filter(slug__in=slugs).values_list("slug", "id")
+        )
+        for row in rows:
+            self.groups[row["id"]] = ids[row["slug"]]
+        self.loaded["group"] += len(rows) - len(existing)
+        self.skipped += len(existing)
+
+    def _load_posts(self, rows):
+        posts = []
+        for row in rows:
+            author_id = self.users.get(row["author_id"])
+            if author_id is None:
+                self.skipped_posts.add(row["id"])
+                continue
+            posts.append(Post(
+                id=row["id"] + self.post_offset,
+                text=row["text"],
+                pub_date=parse_datetime(row["pub_date"]),
+                author_id=author_id,
+                group_id=self.groups.get(row["group_id"]),
+                image=row["image"],
+            ))
+            if row["image"] and self.media_from:
+                self._copy_media(row["image"])
+        Post.objects.bulk_create(posts)
+        self.loaded["post"] += len(posts)
+        self.skipped += len(rows) - len(posts)
+
+    def _load_comments(self, rows):
+        comments = [
+            Comment(
+                id=row["id"] + self.comment_offset,
+                post_id=row["post_id"] + self.post_offset,
+                author_id=self.users[row["author_id"]],
+                text=row["text"],
+                created=parse_datetime(row["created"]),
+            )
+            for row in rows
+            if row["author_id"] in self.users
+            and row["post_id"] not in self.skipped_posts
+        ]
+        Comment.objects.bulk_create(comments)
+        self.loaded["comment"] += len(comments)
+        self.skipped += len(rows) - len(comments)
+
+    def _load_follows(self, rows):
+        pairs = {
+            (self.users[row["user_id"]], self.users[row["author_id"]])
+            for row in rows
+            if row["user_id"] in self.users and row["author_id"] in self.users
+        }
+        pairs = {(user, author) for user, author in pairs if user != author}
+        existing = set(
+            Follow.objects.filter(
+                user_id__in={user for user, _ in pairs}
+            ).values_list("user_id", "author_id")
+        )
+        follows = [
+            Follow(user_id=user, author_id=author)
+            for user, author in pairs - existing
+        ]
+        Follow.objects.bulk_create(follows)
+        self.loaded["follow"] += len(follows)
+        self.skipped += len(rows) - len(follows)
+
+    def _copy_media(self, name):
+        name = os.path.normpath(name)
+        if not name.startswith("posts" + os.sep):
+            return
+        source = os.path.join(self.media_from, name)
+        if not os.path.isfile(source) or default_storage.exists(name):
+            return
+        with open(source, "rb") as content:
+            default_storage.save(name, File(content))
+        self.copied += 1
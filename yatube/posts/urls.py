@@ -9,16 +9,31 @@ urlpatterns = [
     path("profile/<str:username>/", views.profile, name="profile"),
     path("group_posts", views.group_posts, name="group_posts"),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
+    path("search/", views.search, name="search"),
     path("create/", views.post_create, name="post_create"),
     path("posts/<int:post_id>/edit/",
          views.post_edit,
          name="post_edit",
          ),
+    path("posts/<int:post_id>/comments/",
+         views.post_comments,
+         name="post_comments"
+         ),
     path("posts/<int:post_id>/comment/",
          views.add_comment,
          name="add_comment"
          ),
     path("follow/", views.follow_index, name="follow_index"),
+    path("api/posts/", views.api_index, name="api_index"),
+    path("api/posts/<int:post_id>/",
+         views.api_post_detail, name="api_post_detail"),
+    path("api/group/<slug:slug>/",
+         views.api_group_posts, name="api_group_posts"),
+    path("api/profile/<str:username>/",
+         views.api_profile, name="api_profile"),
+    path("api/follow/", views.api_follow_index, name="api_follow_index"),
+    path("api/follow/bulk/",
+         views.api_follow_bulk, name="api_follow_bulk"),
     path("profile/<str:username>/follow/",
          views.profile_follow, name="profile_follow"),
     path(
@@ -1,70 +1,208 @@
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import (get_object_or_404, redirect,
                               render)
+from django.urls import reverse
+from django.views.decorators.http import condition, require_POST
 from posts.forms import CommentForm, PostForm
 
-from .models import Follow, Group, Post, User
+from core.compression import cache_compressed
+from core.replicas import use_replica
 
+from . import caching, follows
+from .models import Comment, Group, Post, Timeline, User
+from .paginators import (CommentPaginator, CursorPaginator,
+                         TimelinePaginator)
+from .search import search_posts
 
-def _page_obj_gen(request, posts):
-    paginator = Paginator(posts, settings.PAGE_COUNT)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+
+def _page_obj_gen(request, posts, paginator_class=CursorPaginator,
+                  feed=None):
+    paginator = paginator_class(posts, settings.PAGE_COUNT, count_key=feed)
+    page_obj = paginator.get_lazy_page(
+        request.GET.get("page"), request.GET.get("cursor")
+    )
     return page_obj
 
 
+def _feed_context(request, feed, posts, paginator_class=CursorPaginator):
+    page_obj = _page_obj_gen(request, posts, paginator_class, feed)
+    position = page_obj.paginator.cache_position(
+        request.GET.get("page"), request.GET.get("cursor")
+    )
+    return {
+        "page_obj": page_obj,
+        "feed_cache_key": caching.page_cache_key(feed, position),
+        "feed_cache_timeout": caching.fragment_timeout(),
+    }
+
+
+def _index_etag(request):
+    return caching.feed_etag(request, caching.INDEX_FEED)
+
+
+def _group_etag(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        "id", flat=True).first()
+    if group_id is None:
+        return None
+    return caching.feed_etag(request, caching.group_feed(group_id))
+
+
+def _profile_etag(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        "id", flat=True).first()
+    if author_id is None:
+        return None
+    # Кнопка подписки зависит от подписок текущего пользователя.
+    return caching.feed_etag(
+        request,
+        caching.author_feed(author_id),
+        caching.follow_feed(request.user.pk),
+    )
+
+
+def _post_detail_etag(request, post_id):
+    author_id = caching.post_author_id(post_id)
+    if author_id is None:
+        return None
+    return caching.feed_etag(
+        request, caching.post_feed(post_id), caching.author_feed(author_id)
+    )
+
+
+def _comments_etag(request, post_id):
+    if caching.post_author_id(post_id) is None:
+        return None
+    return caching.feed_etag(request, caching.post_feed(post_id))
+
+
+def _follow_etag(request):
+    return caching.feed_etag(request, caching.follow_feed(request.user.pk))
+
+
+@use_replica
+@cache_compressed
+@condition(etag_func=_index_etag)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.PAGE_COUNT)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.select_related("author", "group")
     context = {
-        "page_obj": page_obj,
+        **_feed_context(request, caching.INDEX_FEED, post_list),
         "posts": post_list,
     }
     return render(request, "posts/index.html", context)
 
 
+@use_replica
+@cache_compressed
+@condition(etag_func=_group_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, settings.PAGE_COUNT)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.select_related("author", "group")
     context = {
+        **_feed_context(request, caching.group_feed(group.id), posts),
         "group": group,
-        "page_obj": page_obj,
     }
     return render(request, "posts/group_list.html", context)
 
 
+@use_replica
+@cache_compressed
+@condition(etag_func=_profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    user_posts = author.posts.all()
-    paginator = Paginator(user_posts, settings.PAGE_COUNT)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related("stats"), username=username
+    )
+    user_posts = author.posts.select_related("author", "group")
     context = {
+        **_feed_context(
+            request, caching.author_feed(author.id), user_posts
+        ),
         "author": author,
-        "page_obj": page_obj,
+        "following": author.id in caching.following_ids(request.user.pk),
     }
     return render(request, "posts/profile.html", context)
 
 
+@use_replica
+@condition(etag_func=_post_detail_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related("author__stats", "group"), pk=post_id
+    )
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    paginator = CommentPaginator(
+        post.comments.select_related("author"),
+        settings.COMMENTS_PAGE_SIZE,
+        post.comments_count,
+    )
     context = {
         "form": form,
-        "comments": comments,
+        "comments": paginator.get_page(
+            cursor=request.GET.get("comments")
+        ),
         "post": post,
     }
     return render(request, "posts/post_detail.html", context)
 
 
+@use_replica
+@condition(etag_func=_comments_etag)
+def post_comments(request, post_id):
+    """Следующие страницы комментариев: HTML-фрагмент или JSON."""
+    if caching.post_author_id(post_id) is None:
+        raise Http404
+    comments = Comment.objects.filter(post_id=post_id)
+    cursor = request.GET.get("cursor")
+    if request.GET.get("format") != "json":
+        paginator = CommentPaginator(
+            comments.select_related("author"), settings.COMMENTS_PAGE_SIZE
+        )
+        context = {
+            "comments": paginator.get_page(cursor=cursor),
+            "post_id": post_id,
+        }
+        return render(request, "posts/includes/comments.html", context)
+    paginator = CommentPaginator(
+        comments.values("id", "text", "created", "author__username"),
+        settings.COMMENTS_PAGE_SIZE,
+    )
+    page = paginator.get_page(cursor=cursor)
+    next_url = None
+    if paginator.next_cursor:
+        next_url = (
+            f"{reverse('posts:post_comments', args=[post_id])}"
+            f"?format=json&cursor={paginator.next_cursor}"
+        )
+    return JsonResponse({
+        "comments": [
+            {
+                "id": comment["id"],
+                "author": comment["author__username"],
+                "text": comment["text"],
+                "created": comment["created"],
+            }
+            for comment in page
+        ],
+        "next": next_url,
+    })
+
+
+def search(request):
+    query = request.GET.get("q", "").strip()
+    posts, next_cursor = search_posts(
+        query, settings.PAGE_COUNT, request.GET.get("cursor")
+    )
+    context = {
+        "query": query,
+        "posts": posts,
+        "next_cursor": next_cursor,
+    }
+    return render(request, "posts/search.html", context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -110,29 +248,159 @@ def add_comment(request, post_id):
 
 
 @login_required
+@use_replica
+@cache_compressed
+@condition(etag_func=_follow_etag)
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, settings.PAGE_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {'page_obj': page_obj, }
+    entries = Timeline.objects.filter(
+        user=request.user).select_related("post__author", "post__group")
+    if not caching.following_ids(request.user.id):
+        # Подписок нет — лента пуста, в базу не ходим.
+        entries = entries.none()
+    context = _feed_context(
+        request,
+        caching.follow_feed(request.user.id),
+        entries,
+        TimelinePaginator,
+    )
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    author_follow = get_object_or_404(User, username=username)
-    if author_follow != request.user:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author_follow
-        )
+    author = get_object_or_404(User.objects.only("id"), username=username)
+    if author.id != request.user.id:
+        follows.follow(request.user.id, author.id)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    follow = Follow.objects.filter(
-        author__username=username, user=request.user)
-    follow.delete()
+    author_id = User.objects.filter(username=username).values_list(
+        "id", flat=True).first()
+    if author_id is not None:
+        follows.unfollow(request.user.id, author_id)
     return redirect('posts:profile', username=username)
+
+
+# JSON API: те же ленты, но строки читаются через .values() без
+# создания моделей и без шаблонов.
+
+API_POST_FIELDS = (
+    "id", "text", "pub_date", "image", "comments_count",
+    "author__username", "group__slug",
+)
+
+
+class _TimelineRowsPaginator(TimelinePaginator):
+    def prepare(self, objects):
+        return objects
+
+
+def _api_post(row, prefix=""):
+    image = row[prefix + "image"]
+    return {
+        "id": row[prefix + "id"],
+        "text": row[prefix + "text"],
+        "pub_date": row[prefix + "pub_date"].isoformat(),
+        "author": row[prefix + "author__username"],
+        "group": row[prefix + "group__slug"],
+        "image": default_storage.url(image) if image else None,
+        "comments_count": row[prefix + "comments_count"],
+    }
+
+
+def _api_feed(request, rows, paginator_class=CursorPaginator, prefix=""):
+    paginator = paginator_class(rows, settings.PAGE_COUNT)
+    page = paginator.get_page(
+        request.GET.get("page"), request.GET.get("cursor")
+    )
+    links = {}
+    for name, cursor in (("next", paginator.next_cursor),
+                         ("previous", paginator.previous_cursor)):
+        links[name] = f"{request.path}?cursor={cursor}" if cursor else None
+    return JsonResponse(
+        {"results": [_api_post(row, prefix) for row in page], **links},
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+def _api_login_required(view):
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {"detail": "Требуется авторизация."}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@use_replica
+@condition(etag_func=_index_etag)
+def api_index(request):
+    return _api_feed(request, Post.objects.values(*API_POST_FIELDS))
+
+
+@use_replica
+@condition(etag_func=_group_etag)
+def api_group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only("id"), slug=slug)
+    posts = Post.objects.filter(group_id=group.id)
+    return _api_feed(request, posts.values(*API_POST_FIELDS))
+
+
+@use_replica
+@condition(etag_func=_profile_etag)
+def api_profile(request, username):
+    author = get_object_or_404(User.objects.only("id"), username=username)
+    posts = Post.objects.filter(author_id=author.id)
+    return _api_feed(request, posts.values(*API_POST_FIELDS))
+
+
+@_api_login_required
+@use_replica
+@condition(etag_func=_follow_etag)
+def api_follow_index(request):
+    entries = Timeline.objects.filter(user=request.user).values(
+        "pub_date", "post_id",
+        *(f"post__{field}" for field in API_POST_FIELDS),
+    )
+    return _api_feed(request, entries, _TimelineRowsPaginator, "post__")
+
+
+@use_replica
+@condition(etag_func=_post_detail_etag)
+def api_post_detail(request, post_id):
+    row = Post.objects.filter(pk=post_id).values(*API_POST_FIELDS).first()
+    if row is None:
+        raise Http404
+    comments = reverse("posts:post_comments", args=[post_id])
+    return JsonResponse(
+        {**_api_post(row), "comments": f"{comments}?format=json"},
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+@_api_login_required
+@require_POST
+def api_follow_bulk(request):
+    """Подписка или отписка сразу от многих авторов (поля author)."""
+    action = request.POST.get("action", "follow")
+    if action not in ("follow", "unfollow"):
+        return JsonResponse(
+            {"detail": "action: follow или unfollow."}, status=400
+        )
+    usernames = request.POST.getlist("author")
+    if len(usernames) > settings.FOLLOW_BULK_LIMIT:
+        return JsonResponse(
+            {"detail": f"Не больше {settings.FOLLOW_BULK_LIMIT} авторов."},
+            status=400,
+        )
+    author_ids = User.objects.filter(username__in=usernames).values_list(
+        "id", flat=True
+    )
+    if action == "follow":
+        changed = follows.follow_many(request.user.id, author_ids)
+    else:
+        changed = follows.unfollow_many(request.user.id, author_ids)
+    return JsonResponse({"action": action, "changed": changed})
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -45,6 +46,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Без DEBUG отдаёт собранную статику с долгим кэшем и сжатием
+    'core.middleware.PrecompressedStaticMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +64,7 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,10 +86,41 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 с PRAGMA из SQLITE_PRAGMAS и SQLITE_TRANSACTION_MODE
+        'ENGINE': 'core.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение живёт между запросами, а не открывается заново
+        'CONN_MAX_AGE': 60,
+    },
+    # Реплика для чтения лент. Здесь это тот же файл: SQLite в режиме WAL
+    # читает параллельно с записью. Боевую реплику (копию, которую
+    # догоняет, например, litestream) подключают, сменив NAME.
+    'replica': {
+        'ENGINE': 'core.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+    },
+}
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Псевдонимы из DATABASES, с которых читаются ленты (core.replicas).
+# Пустой список — всё читается с основной базы.
+DATABASE_REPLICAS = []
+# Сколько секунд после записи клиент читает только с основной базы
+REPLICA_PIN_SECONDS = 10
+
+# Применяются к каждому новому соединению с SQLite (core.sqlite3).
+# WAL не блокирует чтение на время записи; busy_timeout ждёт блокировку
+# вместо ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'busy_timeout': 5000,
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
 }
+# atomic() сразу берёт блокировку записи и ждёт её по busy_timeout
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
 
 
 # Password validation
@@ -124,25 +161,87 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# Сюда складывает файлы collectstatic
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+if not DEBUG:
+    # Имена с хэшем содержимого и сжатые копии .gz/.br (core.storage).
+    # Требует collectstatic перед запуском.
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 
+# Кэш обязан быть общим для всех процессов: поколения лент сдвигает и
+# runworker (раскладка постов популярных авторов), а локальный кэш
+# процесса (LocMemCache) веб-процессы этих сдвигов не увидят и будут
+# отдавать старые страницы и 304. В бою — memcached или redis.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.InstrumentedFileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
     }
 }
 
 
+# Текстовые ответы меньше этого размера не сжимаются (CompressionMiddleware)
+COMPRESSION_MIN_SIZE = 1024
+
+# Метрики запросов отдаются в /metrics; итог запроса — в Server-Timing
+METRICS_SERVER_TIMING = True
+
 #  подключаем движок filebased.EmailBackend
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 PAGE_COUNT = 10
+# Страницы дальше этой открываются только по курсору (?cursor=)
+PAGE_OFFSET_LIMIT = 10
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGE_WINDOW = 2
+# Комментарии под постом подгружаются страницами такого размера
+COMMENTS_PAGE_SIZE = 20
+# Дальше этого числа строк админка не считает отфильтрованные списки
+ADMIN_COUNT_LIMIT = 10000
+
+# Сколько последних постов автора попадает в ленту при подписке
+TIMELINE_BACKFILL = 100
+TIMELINE_BATCH_SIZE = 500
+# Авторам с большим числом подписчиков ленты раскладывает фоновая задача
+TIMELINE_FANOUT_INLINE_LIMIT = 200
+
+# Сколько авторов можно передать в api/follow/bulk/ за раз
+FOLLOW_BULK_LIMIT = 1000
+
+# Фрагменты лент инвалидируются поколениями, поэтому таймаут большой
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# Миниатюры картинок постов, которые используют шаблоны лент
+POST_THUMBNAILS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+
+# Загрузки пишутся на диск потоком и обрезаются после лимита
+FILE_UPLOAD_HANDLERS = ['posts.uploads.CappedUploadHandler']
+POST_IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+# Картинки постов пересжимаются: JPEG или WEBP
+POST_IMAGE_FORMAT = 'JPEG'
+POST_IMAGE_MAX_DIMENSION = 1920
+POST_IMAGE_QUALITY = 85
+POST_IMAGE_WORKERS = 2
+
+# Фоновые задачи: python manage.py runworker
+JOBS_WORKERS = 4
+JOBS_BATCH_SIZE = 20
+JOBS_POLL_INTERVAL = 1.0
+JOBS_MAX_ATTEMPTS = 5
+# Пауза перед повтором удваивается с каждой попыткой
+JOBS_RETRY_DELAY = 10
+# Задачу, которая выполняется дольше, считаем брошенной упавшим воркером
+# и возвращаем в очередь
+JOBS_LEASE_TIMEOUT = 300
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.urls import include, path
+from core import views as core_views
 from posts import views
 from django.conf import settings
 from django.conf.urls.static import static
@@ -9,12 +10,27 @@ posts_patterns = ([
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('search/', views.search, name='search'),
     path('create/', views.post_create, name='post_create'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'
+         ),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'
          ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('api/posts/', views.api_index, name='api_index'),
+    path('api/posts/<int:post_id>/',
+         views.api_post_detail, name='api_post_detail'),
+    path('api/group/<slug:slug>/',
+         views.api_group_posts, name='api_group_posts'),
+    path('api/profile/<str:username>/',
+         views.api_profile, name='api_profile'),
+    path('api/follow/', views.api_follow_index, name='api_follow_index'),
+    path('api/follow/bulk/',
+         views.api_follow_bulk, name='api_follow_bulk'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -32,6 +48,7 @@ urlpatterns = [
     path('', include(posts_patterns)),
     path('', include('posts.urls', namespace='post')),
     path('admin/', admin.site.urls),
+    path('metrics', core_views.metrics, name='metrics'),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),